@@ -0,0 +1,84 @@
+"""命令解析微基准：旧的 repr + 正则提取 与 CommandRouter 的单次解析对比
+
+新实现使用插件的命令表，额外做了番号拆分和规范化（abc123 -> ABC-123）。
+
+用法: python bench/bench_command.py [次数]
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.command import build_router, split_movie_ids  # noqa: E402
+
+
+class Plain:
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self):
+        return f"Plain(type='Plain', text='{self.text}', convert=True)"
+
+
+OLD_PATTERNS = [
+    (re.compile(r"^搜关键词(.+)", re.IGNORECASE), "搜关键词"),
+    (re.compile(r"^搜演员(.+)"), "搜演员"),
+    (re.compile(r"^搜磁力([a-zA-Z0-9-]+)"), "搜磁力"),
+]
+
+COMMANDS = [
+    "搜磁力abc123",
+    "搜关键词 三上悠亜",
+    "搜演员水卜さくら",
+    "搜磁力SSIS-001",
+]
+
+# 群聊中绝大多数消息不是命令，每条消息都要经过所有处理器的过滤
+CHATTER = [
+    "今天天气不错",
+    "hello everyone",
+    "搜一下这个",
+    "[图片]",
+    "晚上吃什么",
+    "ok",
+]
+
+
+def old_parse(text: str):
+    """旧实现：框架对每条消息逐个执行各处理器的正则过滤，命中的处理器再对消息段的repr做正则提取"""
+    result = None
+    for pattern, command in OLD_PATTERNS:
+        if pattern.match(text):
+            raw = str([Plain(text)][0])
+            result = command, re.findall(r"text='(.*?)'", raw)[0].split(command)[1].strip()
+    return result
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # 与插件使用同一份命令表
+    router = build_router()
+
+    def new_parse(text: str):
+        command = router.parse(text)
+        if command and command.name == "搜磁力":
+            return command.name, split_movie_ids(command.arg)
+        return command
+
+    workloads = (
+        ("命令", COMMANDS),
+        ("闲聊", CHATTER),
+        ("混合(1:9)", COMMANDS + CHATTER * 6),
+    )
+    for workload, messages in workloads:
+        print(f"[{workload}]")
+        for name, fn in (("regex-on-repr", old_parse), ("CommandRouter", new_parse)):
+            seconds = timeit.timeit(lambda: [fn(m) for m in messages], number=number)
+            per_message = seconds / (number * len(messages)) * 1e9
+            print(f"  {name:<15} {per_message:8.1f} ns/消息")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""负载基准：本地模拟 javbus-api 与百度翻译服务，并发驱动插件的三个搜索命令
+
+启动两个本地 aiohttp 模拟服务（延迟与错误率可配置），用合成的消息事件并发调用
+插件的统一命令入口，统计吞吐、各命令 p50/p95/p99 延迟以及上游各接口的调用次数，
+便于比较缓存、连接池等改动前后的表现。
+
+需要在已安装 AstrBot 的环境中运行：
+
+    python bench/bench_load.py --requests 500 --concurrency 50
+    python bench/bench_load.py --latency-ms 80 --error-rate 0.05 --translate
+    python bench/bench_load.py --set cache_enabled=false --set store_enabled=false
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import types
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "javbus_search_bench"
+
+
+def load_plugin():
+    """以包的形式加载插件目录，使 main.py 中的相对导入可用"""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [ROOT]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.main")
+
+
+def stable_hash(value: str) -> int:
+    return zlib.crc32(value.encode("utf-8"))
+
+
+class LatencyModel:
+    """模拟上游延迟与错误：延迟服从均值为 mean 的指数分布加固定底噪，按比例返回5xx"""
+
+    def __init__(self, mean_ms: float, floor_ms: float, error_rate: float, rng: random.Random):
+        self.mean = mean_ms / 1000
+        self.floor = floor_ms / 1000
+        self.error_rate = error_rate
+        self.rng = rng
+
+    async def wait(self) -> bool:
+        """等待一次模拟延迟，返回本次是否应当失败"""
+        delay = self.floor + (self.rng.expovariate(1 / self.mean) if self.mean > 0 else 0)
+        await asyncio.sleep(delay)
+        return self.rng.random() < self.error_rate
+
+
+class MockJavBus:
+    """模拟 javbus-api 的 search / detail / magnets / stars 接口"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.app = web.Application()
+        self.app.router.add_get("/api/movies", self.movies)
+        self.app.router.add_get("/api/movies/search", self.search)
+        self.app.router.add_get("/api/movies/{movie_id}", self.detail)
+        self.app.router.add_get("/api/magnets/{movie_id}", self.magnets)
+        self.app.router.add_get("/api/stars/{star_id}", self.star)
+
+    async def _begin(self, route: str) -> Optional[web.Response]:
+        self.calls[route] += 1
+        if await self.latency.wait():
+            self.errors[route] += 1
+            return web.json_response({"error": "mock failure"}, status=503)
+        return None
+
+    @staticmethod
+    def _movie(movie_id: str, star_name: str) -> Dict[str, Any]:
+        return {
+            "id": movie_id,
+            "title": f"{movie_id} サンプルタイトル",
+            "img": f"https://www.javbus.com/pics/cover/{movie_id.lower()}_b.jpg",
+            "date": "2024-01-01",
+            "tags": ["高画質", "単体作品"],
+            "stars": [{"id": f"star{stable_hash(star_name) % 10000}", "name": star_name}],
+        }
+
+    async def movies(self, request: web.Request) -> web.Response:
+        failed = await self._begin("movies")
+        if failed:
+            return failed
+        page = int(request.query.get("page", 1))
+        movies = [self._movie(f"NEW-{page:02d}{i:02d}", "サンプル") for i in range(30)]
+        return web.json_response({"movies": movies, "pagination": {"currentPage": page, "hasNextPage": True}})
+
+    async def search(self, request: web.Request) -> web.Response:
+        failed = await self._begin("search")
+        if failed:
+            return failed
+        keyword = request.query.get("keyword", "")
+        page = int(request.query.get("page", 1))
+        label = "".join(c for c in keyword.upper() if c.isalnum())[:4] or "KW"
+        movies = [self._movie(f"{label}-{page:01d}{i:02d}", keyword) for i in range(30)]
+        return web.json_response({"movies": movies, "pagination": {"currentPage": page, "hasNextPage": page < 3}})
+
+    async def detail(self, request: web.Request) -> web.Response:
+        failed = await self._begin("detail")
+        if failed:
+            return failed
+        movie_id = request.match_info["movie_id"]
+        movie = self._movie(movie_id, "サンプル")
+        movie.update({
+            "videoLength": 120,
+            "gid": str(stable_hash(movie_id) % 100000),
+            "uc": "0",
+            "director": {"id": "d1", "name": "監督"},
+        })
+        return web.json_response(movie)
+
+    async def magnets(self, request: web.Request) -> web.Response:
+        failed = await self._begin("magnets")
+        if failed:
+            return failed
+        movie_id = request.match_info["movie_id"]
+        return web.json_response([
+            {
+                "id": f"{movie_id}-{i}",
+                "link": f"magnet:?xt=urn:btih:{stable_hash(f'{movie_id}-{i}'):040x}",
+                "isHD": i % 2 == 0,
+                "title": f"{movie_id} [{i}]",
+                "size": f"{1 + i * 0.7:.2f}GB",
+                "shareDate": "2024-01-02",
+                "hasSubtitle": i % 3 == 0,
+            }
+            for i in range(8)
+        ])
+
+    async def star(self, request: web.Request) -> web.Response:
+        failed = await self._begin("star")
+        if failed:
+            return failed
+        star_id = request.match_info["star_id"]
+        return web.json_response({
+            "id": star_id, "name": star_id, "avatar": f"https://www.javbus.com/pics/actress/{star_id}.jpg",
+            "birthday": "1995-01-01", "age": "29", "height": "160cm",
+            "bust": "85cm", "waistline": "58cm", "hipline": "86cm",
+        })
+
+
+class MockTranslator:
+    """模拟百度翻译接口，逐行原样返回"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.calls = 0
+        self.lines = 0
+        self.app = web.Application()
+        self.app.router.add_get("/api/trans/vip/translate", self.translate)
+
+    async def translate(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        if await self.latency.wait():
+            return web.json_response({"error_code": "52002", "error_msg": "mock failure"})
+        lines = request.query.get("q", "").split("\n")
+        self.lines += len(lines)
+        return web.json_response({
+            "from": request.query.get("from"), "to": request.query.get("to"),
+            "trans_result": [{"src": line, "dst": line} for line in lines],
+        })
+
+
+class BenchEvent:
+    """合成的消息事件，实现插件用到的 AstrMessageEvent 接口"""
+
+    def __init__(self, text: str, sender: str, group: str):
+        self.message_str = text
+        self._sender = sender
+        self._group = group
+
+    def get_messages(self) -> List[Any]:
+        return []
+
+    def get_sender_id(self) -> str:
+        return self._sender
+
+    def get_group_id(self) -> str:
+        return self._group
+
+    def get_self_id(self) -> str:
+        return "10000"
+
+    def plain_result(self, text: str) -> Tuple[str, str]:
+        return "plain", text
+
+    def chain_result(self, chain: List[Any]) -> Tuple[str, List[Any]]:
+        return "chain", chain
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def build_workload(args, rng: random.Random) -> List[Tuple[str, str]]:
+    """按命令配比生成 (命令, 消息文本) 列表；番号/关键词/演员从有限集合中抽取以模拟重复查询"""
+    weights = {}
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    ids = [f"ABC-{i:03d}" for i in range(args.distinct)]
+    keywords = [f"KW{i}" for i in range(args.distinct)]
+    stars = [f"演员{i}" for i in range(max(1, args.distinct // 5))]
+    makers = {
+        "search": lambda: f"搜关键词{rng.choice(keywords)}",
+        "star": lambda: f"搜演员{rng.choice(stars)}",
+        "magnet": lambda: f"搜磁力{rng.choice(ids)}",
+    }
+    names = [name for name in weights if name in makers]
+    if not names:
+        raise SystemExit(f"--mix 中没有可用命令，可选: {', '.join(makers)}")
+    picks = rng.choices(names, weights=[weights[n] for n in names], k=args.requests)
+    return [(name, makers[name]()) for name in picks]
+
+
+async def start_server(app: web.Application) -> Tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, port
+
+
+def parse_value(value: str) -> Any:
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+async def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    api = MockJavBus(LatencyModel(args.latency_ms, args.floor_ms, args.error_rate, rng))
+    translator = MockTranslator(LatencyModel(args.translate_latency_ms, 0, args.error_rate, rng))
+    api_runner, api_port = await start_server(api.app)
+    trans_runner, trans_port = await start_server(translator.app)
+
+    main = load_plugin()
+    data_dir = tempfile.mkdtemp(prefix="javbus_bench_")
+    config = {
+        "javbus_api_url": f"http://127.0.0.1:{api_port}",
+        "javbus_image_proxy": "https://img.example.com",
+        "baidu_api_key": "bench",
+        "baidu_secret_key": "bench",
+        "data_dir": data_dir,
+        "rate_limit_enabled": False,
+        "image_cache_enabled": False,
+        "translate_results": args.translate,
+    }
+    for item in args.set:
+        key, _, value = item.partition("=")
+        config[key.strip()] = parse_value(value.strip())
+
+    plugin = main.JavBusSerach(None, config)
+    plugin.trans.api_url = f"http://127.0.0.1:{trans_port}/api/trans/vip/translate"
+
+    workload = build_workload(args, rng)
+    latencies: Dict[str, List[float]] = {}
+    failures: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(index: int, command: str, text: str) -> None:
+        event = BenchEvent(text, sender=f"u{index % args.users}", group=f"g{index % args.groups}")
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                results = [result async for result in plugin.on_message(event)]
+            except Exception:
+                failures[command] += 1
+                return
+            finally:
+                latencies.setdefault(command, []).append(time.perf_counter() - started)
+        # 处理器内部吞掉异常后以纯文本提示返回，也计为失败
+        if not results or (results[0][0] == "plain" and ("异常" in results[0][1] or "不可用" in results[0][1])):
+            failures[command] += 1
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i, command, text) for i, (command, text) in enumerate(workload)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await plugin.api.close()
+        await plugin.trans.close()
+        if plugin.image_cache:
+            await plugin.image_cache.close()
+        await api_runner.cleanup()
+        await trans_runner.cleanup()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    commands = {}
+    for command, values in sorted(latencies.items()):
+        commands[command] = {
+            "count": len(values),
+            "failures": failures[command],
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(max(values) * 1000, 2),
+        }
+    return {
+        "requests": len(workload),
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(workload) / elapsed, 1) if elapsed else 0.0,
+        "commands": commands,
+        "upstream_calls": dict(api.calls),
+        "upstream_errors": dict(api.errors),
+        "translate_calls": translator.calls,
+        "translate_lines": translator.lines,
+        "cache": plugin.api.cache_stats(),
+        "inflight": plugin.api.inflight_stats(),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"请求数: {report['requests']}  并发: {report['concurrency']}  "
+          f"耗时: {report['elapsed_s']}s  吞吐: {report['throughput_rps']} req/s")
+    print(f"{'命令':<8}{'次数':>6}{'失败':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+    for command, row in report["commands"].items():
+        print(f"{command:<8}{row['count']:>6}{row['failures']:>6}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+    print("上游调用: " + ", ".join(f"{k}={v}" for k, v in sorted(report["upstream_calls"].items())))
+    if report["upstream_errors"]:
+        print("上游错误: " + ", ".join(f"{k}={v}" for k, v in sorted(report["upstream_errors"].items())))
+    print(f"翻译调用: {report['translate_calls']} 次，共 {report['translate_lines']} 行")
+    if report["cache"]:
+        print(f"响应缓存: {report['cache']}")
+    print(f"请求合并: {report['inflight']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JavBus 搜索插件负载基准")
+    parser.add_argument("--requests", type=int, default=300, help="总请求数")
+    parser.add_argument("--concurrency", type=int, default=30, help="并发数")
+    parser.add_argument("--mix", default="search=4,star=1,magnet=5", help="命令配比，如 search=4,star=1,magnet=5")
+    parser.add_argument("--distinct", type=int, default=40, help="不同番号/关键词的数量，越小缓存命中越多")
+    parser.add_argument("--users", type=int, default=20, help="模拟用户数")
+    parser.add_argument("--groups", type=int, default=5, help="模拟群数")
+    parser.add_argument("--latency-ms", type=float, default=30, help="上游平均附加延迟")
+    parser.add_argument("--floor-ms", type=float, default=5, help="上游最低延迟")
+    parser.add_argument("--translate-latency-ms", type=float, default=20, help="翻译接口平均延迟")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="上游返回错误的比例")
+    parser.add_argument("--translate", action="store_true", help="开启搜索结果翻译")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="覆盖插件配置，值按JSON解析，可多次指定")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果，便于前后对比")
+    parser.add_argument("--verbose", action="store_true", help="保留插件日志输出")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""结果模型内存基准：缓存原始接口字典 与 缓存紧凑模型 的驻留内存和存储体积对比
+
+构造与 javbus-api 返回结构一致的影片详情和磁力列表（含样品图、类别、相似影片等回复用不到的字段），
+分别以原始字典和 MovieDetail/Magnet 模型的形式常驻内存，用 tracemalloc 统计占用。
+
+用法: python bench/bench_models.py [条数]
+"""
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.models import MAGNETS, MOVIE_DETAIL, dumps, loads, orjson  # noqa: E402
+
+
+def make_detail(i: int) -> dict:
+    movie_id = f"ABC-{i:05d}"
+    return {
+        "id": movie_id,
+        "title": f"{movie_id} 新人NO.1STYLE サンプルタイトル {i}",
+        "img": f"https://www.javbus.com/pics/cover/{i:x}_b.jpg",
+        "imageSize": {"width": 800, "height": 538},
+        "date": "2023-05-01",
+        "videoLength": 120 + i % 60,
+        "director": {"id": f"d{i % 97}", "name": f"導演{i % 97}"},
+        "producer": {"id": f"p{i % 31}", "name": f"メーカー{i % 31}"},
+        "publisher": {"id": f"l{i % 29}", "name": f"レーベル{i % 29}"},
+        "series": {"id": f"s{i % 53}", "name": f"シリーズ{i % 53}"},
+        "genres": [{"id": f"g{j}", "name": f"ジャンル{j}"} for j in range(i % 7, i % 7 + 6)],
+        "stars": [{"id": f"st{(i + j) % 500}", "name": f"女優{(i + j) % 500}"} for j in range(2)],
+        "gid": str(50000000000 + i),
+        "uc": "0",
+        "samples": [
+            {
+                "alt": f"{movie_id} サンプル画像 {j}",
+                "id": f"{movie_id}_{j}",
+                "src": f"https://www.javbus.com/pics/sample/{i:x}_{j}.jpg",
+                "thumbnail": f"https://www.javbus.com/pics/thumb/{i:x}_{j}.jpg",
+            }
+            for j in range(1, 11)
+        ],
+        "similarMovies": [
+            {"id": f"SIM-{(i + j) % 99999:05d}", "title": f"関連作品 {j}",
+             "img": f"https://www.javbus.com/pics/thumb/{(i + j):x}.jpg"}
+            for j in range(6)
+        ],
+    }
+
+
+def make_magnets(i: int) -> list:
+    return [
+        {
+            "id": f"{i:08X}{j:032X}",
+            "link": f"magnet:?xt=urn:btih:{i:08X}{j:032X}&dn=ABC-{i:05d}",
+            "isHD": j % 2 == 0,
+            "title": f"ABC-{i:05d}{'-C' if j % 3 == 0 else ''}",
+            "size": f"{1 + j}.{i % 10}GB",
+            "numberSize": (1 + j) * 1073741824,
+            "shareDate": "2023-05-02",
+            "hasSubtitle": j % 3 == 0,
+        }
+        for j in range(5)
+    ]
+
+
+def resident(build) -> int:
+    """构建对象并在其存活时统计分配的字节数"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"条数: {count}  序列化: {'orjson' if orjson is not None else 'json'}")
+
+    # 每条接口数据都经过一次JSON往返，和从网络解析出来的对象一样互不共享字符串
+    details = [json.dumps(make_detail(i), ensure_ascii=False) for i in range(count)]
+    magnets = [json.dumps(make_magnets(i), ensure_ascii=False) for i in range(count)]
+
+    rows = [
+        ("影片详情", details, MOVIE_DETAIL),
+        ("磁力列表", magnets, MAGNETS),
+    ]
+    for name, payloads, codec in rows:
+        raw_bytes = resident(lambda: [json.loads(p) for p in payloads])
+        model_bytes = resident(lambda: [codec.from_api(json.loads(p)) for p in payloads])
+        print(f"[{name}] 常驻内存")
+        print(f"  原始字典 {raw_bytes / 1048576:8.1f} MB  {raw_bytes / count:7.0f} B/条")
+        print(f"  紧凑模型 {model_bytes / 1048576:8.1f} MB  {model_bytes / count:7.0f} B/条"
+              f"  ({model_bytes / raw_bytes:.0%})")
+
+        sample = payloads[:min(count, 10000)]
+        models = [codec.from_api(json.loads(p)) for p in sample]
+        stored_rows = [dumps(codec.to_row(m)) for m in models]
+        full_size = sum(len(p.encode('utf-8')) for p in sample)
+        row_size = sum(len(r.encode('utf-8')) for r in stored_rows)
+        print(f"[{name}] 本地存储体积（{len(sample)} 条）")
+        print(f"  完整JSON {full_size / len(sample):7.0f} B/条")
+        print(f"  紧凑行   {row_size / len(sample):7.0f} B/条  ({row_size / full_size:.0%})")
+
+        seconds = timeit.timeit(lambda: [codec.from_row(loads(r)) for r in stored_rows], number=1)
+        print(f"  紧凑行反序列化 {seconds / len(stored_rows) * 1e6:6.1f} us/条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""回复渲染微基准：原先各命令内联拼接 f-string 与 Renderer 预解析模板（首次渲染/缓存命中）对比
+
+用法: python bench/bench_render.py [次数]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.models import MAGNETS, MOVIE_DETAIL, MOVIE_PAGE  # noqa: E402
+from utils.render import Renderer  # noqa: E402
+
+
+PAGE = MOVIE_PAGE.from_api({
+    "movies": [
+        {"id": f"ABC-{i:03d}", "title": f"ABC-{i:03d} 新人NO.1STYLE サンプルタイトル {i}",
+         "img": f"https://www.javbus.com/pics/thumb/{i}.jpg", "date": "2023-05-01",
+         "tags": ["高画質", "単体作品", "美少女"]}
+        for i in range(10)
+    ],
+})
+DETAIL = MOVIE_DETAIL.from_api({
+    "id": "ABC-001", "title": "ABC-001 新人NO.1STYLE サンプルタイトル", "img": "https://www.javbus.com/pics/cover/1_b.jpg",
+    "date": "2023-05-01", "videoLength": 130, "director": {"id": "d1", "name": "導演"},
+    "stars": [{"id": f"s{i}", "name": f"女優{i}"} for i in range(4)], "gid": "1", "uc": "0",
+})
+MAGNET_LIST = MAGNETS.from_api([
+    {"link": f"magnet:?xt=urn:btih:{i:040X}", "title": f"ABC-001{'-C' if i % 2 else ''}", "size": f"{i + 1}.2GB",
+     "shareDate": "2023-05-02", "isHD": i % 2 == 0, "hasSubtitle": i % 2 == 1}
+    for i in range(5)
+])
+
+
+def inline_movies():
+    out = []
+    for data in PAGE.movies:
+        title = data.title
+        title = title[:20] + "..." if len(title) > 20 else title
+        tags = [tag for tag in data.tags]
+        out.append(f"番号: {data.id}\n标题: {title}\n日期: {data.date}\n标签: {', '.join(tags)}\n")
+    return out
+
+
+def inline_magnet_reply():
+    detail = DETAIL
+    video_length = f"{detail.video_length // 60}小时{detail.video_length % 60}分钟"
+    stars_str = "、".join(star.name for star in detail.stars[:3])
+    if len(detail.stars) > 3:
+        stars_str += f" 等{len(detail.stars)}人"
+    lines = [
+        f"【影片详情】\n番号：{detail.id}\n标题：{detail.title or 'N/A'}\n日期：{detail.date or 'N/A'}\n"
+        f"时长：{video_length}\n演员：{stars_str}\n导演：{detail.director or '未知'}"
+    ]
+    for idx, magnet in enumerate(MAGNET_LIST, 1):
+        lines.append(
+            f"{idx}. {magnet.title} {magnet.size}\n{magnet.share_date}\n"
+            f"{' 高清' if magnet.is_hd else ''} 字幕：{'有' if magnet.has_subtitle else '无'}\n{magnet.link}"
+        )
+    return lines
+
+
+def clear_rendered():
+    for model in (*PAGE.movies, DETAIL, *MAGNET_LIST):
+        model.rendered = None
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    renderer = Renderer()
+
+    def template_movies():
+        return [renderer.movie(movie) for movie in PAGE.movies]
+
+    def template_magnet_reply():
+        return [renderer.detail(DETAIL)] + [renderer.magnet(idx, m) for idx, m in enumerate(MAGNET_LIST, 1)]
+
+    assert inline_movies() == template_movies()
+    assert inline_magnet_reply() == template_magnet_reply()
+
+    workloads = (
+        ("搜索结果(10条)", inline_movies, template_movies),
+        ("影片详情+5条磁力", inline_magnet_reply, template_magnet_reply),
+    )
+    for workload, inline, template in workloads:
+        print(f"[{workload}]")
+        seconds = timeit.timeit(inline, number=number)
+        print(f"  {'内联f-string':<14} {seconds / number * 1e6:8.2f} us/次")
+
+        def uncached():
+            clear_rendered()
+            template()
+        # 扣除清空缓存本身的耗时
+        overhead = timeit.timeit(clear_rendered, number=number)
+        seconds = timeit.timeit(uncached, number=number) - overhead
+        print(f"  {'模板(首次渲染)':<14} {seconds / number * 1e6:8.2f} us/次")
+        seconds = timeit.timeit(template, number=number)
+        print(f"  {'模板(缓存命中)':<14} {seconds / number * 1e6:8.2f} us/次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""启动耗时预算检查：插件模块导入耗时与插件构造耗时
+
+导入耗时在子进程中测量，预先导入 aiohttp 和 AstrBot 等框架依赖（AstrBot 加载插件时它们已在内存中），
+只统计插件自身模块的导入。构造耗时在填充了演员索引、翻译缓存、本地存储等数据的数据目录上测量，
+并与构造后立即加载全部组件（即此前的同步启动方式）对比。超出预算时以退出码1结束，可用于CI。
+
+需要在已安装 AstrBot 的环境中运行：
+
+    python bench/bench_startup.py
+    python bench/bench_startup.py --import-budget-ms 30 --init-budget-ms 5 --stars 20000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import load_plugin  # noqa: E402
+
+
+def child_import() -> None:
+    """子进程：预先导入框架依赖后，测量插件模块的导入耗时"""
+    import aiohttp  # noqa: F401
+    import astrbot.api  # noqa: F401
+    import astrbot.api.event  # noqa: F401
+    import astrbot.api.star  # noqa: F401
+    import astrbot.api.message_components  # noqa: F401
+    started = time.perf_counter()
+    load_plugin()
+    print(json.dumps({"import_ms": (time.perf_counter() - started) * 1000}))
+
+
+def measure_import(runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child-import"],
+            check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1])["import_ms"])
+    return statistics.median(samples)
+
+
+def populate(main, data_dir: str, stars: int, translations: int, movies: int) -> None:
+    """按线上规模填充数据目录"""
+    with open(os.path.join(data_dir, "star_index.json"), "w", encoding="utf-8") as f:
+        json.dump({"stars": {f"s{i}": [f"女優{i}", f"Actress {i}", f"じょゆう{i}"] for i in range(stars)}},
+                  f, ensure_ascii=False)
+    with open(os.path.join(data_dir, "translate_cache.json"), "w", encoding="utf-8") as f:
+        json.dump([[f"テキスト{i}", "auto", "zh", f"文本{i}"] for i in range(translations)], f, ensure_ascii=False)
+
+    store = main.MetadataStore(os.path.join(data_dir, "metadata.db"))
+    for i in range(movies):
+        store._put_sync("movies", f"ABC-{i:05d}", [f"ABC-{i:05d}", "title", "img", "2023-05-01", [], [],
+                                                   120, "", str(i), "0"])
+    store.close()
+
+
+def measure_init(main, config, runs: int):
+    construct, eager = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        plugin = main.JavBusSerach(None, config)
+        construct.append((time.perf_counter() - started) * 1000)
+        # 此前的启动方式：构造时同步创建全部组件
+        started = time.perf_counter()
+        plugin._preload()
+        eager.append(construct[-1] + (time.perf_counter() - started) * 1000)
+        asyncio.run(plugin.terminate())
+    return statistics.median(construct), statistics.median(eager)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JavBus 搜索插件启动耗时预算检查")
+    parser.add_argument("--import-budget-ms", type=float, default=50, help="插件模块导入耗时预算")
+    parser.add_argument("--init-budget-ms", type=float, default=10, help="插件构造耗时预算")
+    parser.add_argument("--runs", type=int, default=5, help="测量次数，取中位数")
+    parser.add_argument("--stars", type=int, default=5000, help="演员索引条数")
+    parser.add_argument("--translations", type=int, default=4096, help="翻译缓存条数")
+    parser.add_argument("--movies", type=int, default=5000, help="本地存储影片条数")
+    parser.add_argument("--child-import", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_import:
+        child_import()
+        return
+
+    logging.disable(logging.CRITICAL)
+    import_ms = measure_import(args.runs)
+    main_module = load_plugin()
+    data_dir = tempfile.mkdtemp(prefix="javbus_startup_")
+    try:
+        populate(main_module, data_dir, args.stars, args.translations, args.movies)
+        config = {
+            "javbus_api_url": "http://127.0.0.1:9",
+            "baidu_api_key": "",
+            "baidu_secret_key": "",
+            "data_dir": data_dir,
+        }
+        init_ms, eager_ms = measure_init(main_module, config, args.runs)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print(f"插件导入: {import_ms:8.1f} ms  (预算 {args.import_budget_ms:g} ms)")
+    print(f"插件构造: {init_ms:8.1f} ms  (预算 {args.init_budget_ms:g} ms)")
+    print(f"构造+加载全部组件: {eager_ms:8.1f} ms  (后台线程中完成，不计入预算)")
+
+    over = []
+    if import_ms > args.import_budget_ms:
+        over.append("导入")
+    if init_ms > args.init_budget_ms:
+        over.append("构造")
+    if over:
+        print(f"超出预算: {'、'.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,44 @@
+import asyncio
+import os
 import random
-import re
-from typing import AsyncGenerator, Any, List, Optional, Dict, Coroutine
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, Any, List, Optional, Dict, Coroutine, Tuple, Union, Callable, Awaitable
 import aiohttp
 from astrbot.core.message.message_event_result import MessageEventResult
-from astrbot.api.event import filter, AstrMessageEvent
+from astrbot.api.event import filter, AstrMessageEvent, MessageChain
 from astrbot.api.star import Context, Star, register
 from astrbot.api import logger, AstrBotConfig
 import astrbot.api.message_components as comp
 
 
 from .utils.translate import BaiduTranslator
+from .utils.breaker import CircuitBreaker
+from .utils.cache import BaseCache, ResponseCache
+from .utils.singleflight import SingleFlight
+from .utils.store import MetadataStore
+from .utils.star_index import StarIndex
+from .utils.transport import TransportConfig
+from .utils.ratelimit import AdmissionController, BudgetExhausted
+from .utils.backends import Backend, BackendPool
+from .utils.hedge import HedgePolicy
+from .utils.images import ImageCache
+from .utils.command import build_router, compact_movie_id, message_text, split_movie_ids
+from .utils.metrics import get_metrics
+from .utils.warmer import Prewarmer
+from .utils.models import MAGNETS, MOVIE_DETAIL, MOVIE_PAGE, STAR, Codec, Magnet, Movie, MovieDetail, MoviePage, StarInfo
+from .utils.render import Renderer
+from .utils.ranking import MagnetPreference, PreferenceStore, parse_preference, rank_magnets
+from .utils.subscribe import ID_KINDS, KIND_NAMES, Subscription, SubscriptionManager, parse_filter_id, parse_kind
 
 
 @register("JavBus Serach", "cloudcranesss", "一个基于JavBus API的搜索服务", "v1.0.1",
           "https://github.com/cloudcranesss/astrbot_plugin_javbus_search")
 class JavBusSerach(Star):
+    # 延迟创建的组件，按依赖顺序排列，预加载按此顺序进行
+    COMPONENTS = ('star_index', 'api', 'trans', 'image_cache', 'magnet_prefs', 'subscriptions', 'prewarmer')
+
     def __init__(self, context: Context, config: AstrBotConfig):
         super().__init__(context)
         self.config = config
@@ -24,20 +48,252 @@ class JavBusSerach(Star):
         self.baidu_api_key = config.get("baidu_api_key", "")
         self.baidu_secret_key = config.get("baidu_secret_key", "")
         self.qq_access_token = config.get("qq_access_token", "")
+        self.translate_results = config.get("translate_results", False)
+        # 搜索结果分页与分块发送
+        self.display_limit = max(1, config.get("result_display_limit", 10))
+        self.progressive_reply = config.get("progressive_reply", False)
+        self.reply_chunk_size = max(1, config.get("reply_chunk_size", 5))
+        self.cursor_ttl = config.get("cursor_ttl", 600)
+        self.bulk_magnet_max = max(1, config.get("bulk_magnet_max", 10))
+        self.magnet_display_count = max(1, config.get("magnet_display_count", 5))
+        self.renderer = Renderer.from_config(config)
+        for error in self.renderer.errors:
+            logger.error(f"回复模板配置无效，使用默认模板: {error}")
+        self._cursors: "OrderedDict[str, Tuple[str, int, int, float]]" = OrderedDict()
+        self.metrics = get_metrics()
+        self.router = build_router()
+        self._handlers = {
+            "搜关键词": self.search_movies,
+            "搜演员": self.search_star,
+            "搜磁力": self.search_magnet,
+            "下一页": self.next_page,
+            "javbus状态": self.show_status,
+            "订阅": self.subscribe,
+            "取消订阅": self.unsubscribe,
+            "订阅列表": self.list_subscriptions,
+            "磁力偏好": self.magnet_preference,
+        }
+        # 解析为绝对路径，本地图片以文件路径发送，不能依赖机器人进程的工作目录
+        self.data_dir = os.path.abspath(config.get("data_dir", "") or os.path.join("data", "javbus_search"))
         logger.info(
             f"初始化JavBus搜索插件，API地址: {self.javbus_api_url}\n"
             f"转发地址配置: {'已配置' if self.forward_url else '未配置'}\n"
             f"JavBus 图片代理地址: {self.javbus_image_proxy}")
-        self.api = JavBusAPI(self.javbus_api_url)
-        self.trans = BaiduTranslator(self.baidu_api_key, self.baidu_secret_key)
+        self.limiter = AdmissionController.from_config(config)
+        # 网络客户端、本地存储和各类索引在首次使用时创建，插件加载只解析配置；
+        # 有运行中的事件循环时在线程池中提前加载，不阻塞AstrBot启动
+        self._components: Dict[str, Any] = {}
+        self._component_locks = {name: threading.Lock() for name in self.COMPONENTS}
+        self._startup: Optional[asyncio.Task] = None
+        self._closed = False
+        self._start_background()
+
+    def _component(self, name: str, build) -> Any:
+        """获取组件，不存在时创建；同一组件只创建一次，可在线程池中调用"""
+        try:
+            return self._components[name]
+        except KeyError:
+            pass
+        with self._component_locks[name]:
+            if name not in self._components:
+                started = time.perf_counter()
+                self._components[name] = build()
+                logger.debug("组件 %s 初始化耗时 %.1fms", name, (time.perf_counter() - started) * 1000)
+        return self._components[name]
+
+    @property
+    def star_index(self) -> StarIndex:
+        return self._component('star_index', lambda: StarIndex(os.path.join(self.data_dir, "star_index.json")))
+
+    @property
+    def api(self) -> "JavBusAPI":
+        return self._component('api', self._build_api)
+
+    @property
+    def trans(self) -> BaiduTranslator:
+        return self._component('trans', lambda: BaiduTranslator(
+            self.baidu_api_key,
+            self.baidu_secret_key,
+            cache_path=os.path.join(self.data_dir, "translate_cache.json"),
+            cache_size=self.config.get("translate_cache_size", 4096)
+        ))
+
+    @property
+    def image_cache(self) -> Optional[ImageCache]:
+        return self._component('image_cache', self._build_image_cache)
 
+    @property
+    def magnet_prefs(self) -> PreferenceStore:
+        return self._component('magnet_prefs', lambda: PreferenceStore(
+            os.path.join(self.data_dir, "magnet_prefs.json"),
+            MagnetPreference.from_config(self.config)
+        ))
+
+    @property
+    def subscriptions(self) -> Optional[SubscriptionManager]:
+        return self._component('subscriptions', self._build_subscriptions)
+
+    @property
+    def prewarmer(self) -> Optional[Prewarmer]:
+        return self._component('prewarmer', lambda: Prewarmer.from_config(self.api, self.config))
+
+    def _preload(self) -> None:
+        for name in self.COMPONENTS:
+            # 插件卸载时在组件之间停下，不再创建新组件
+            if self._closed:
+                return
+            getattr(self, name)
+
+    def _start_background(self) -> None:
+        """在运行中的事件循环内启动组件预加载和后台任务；插件加载时没有事件循环则在收到第一条消息时启动"""
+        if self._startup is not None or self._closed:
+            return
+        try:
+            self._startup = asyncio.get_running_loop().create_task(self._start_up())
+        except RuntimeError:
+            pass
+
+    async def _start_up(self) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._preload)
+        except Exception as e:
+            # 预加载失败的组件会在首次使用时重新创建
+            logger.error(f"插件组件预加载失败: {str(e)}", exc_info=True)
+        if self._closed:
+            return
+        logger.info(f"插件组件加载完成，耗时 {(time.perf_counter() - started) * 1000:.0f}ms")
+        if self.prewarmer:
+            self.prewarmer.start()
+        if self.subscriptions:
+            self.subscriptions.start()
+
+    async def _ready(self) -> None:
+        """等待组件预加载完成，命令处理前调用"""
+        self._start_background()
+        if self._startup is not None and not self._startup.done():
+            await asyncio.shield(self._startup)
+
+    async def terminate(self):
+        """插件卸载时停止后台任务，关闭网络会话并保存本地数据；只处理已创建的组件"""
+        self._closed = True
+        if self._startup is not None and not self._startup.done():
+            # 预加载在线程池中执行，取消任务不会中断线程；等它在当前组件创建完后停下，
+            # 避免关闭之后才创建出的组件（本地存储、网络会话）泄漏
+            await asyncio.shield(self._startup)
+        components = self._components
+        for name in ('prewarmer', 'subscriptions'):
+            if components.get(name):
+                await components[name].stop()
+        if 'api' in components:
+            # 同时关闭本地存储并保存演员索引
+            await components['api'].close()
+        elif 'star_index' in components:
+            components['star_index'].save()
+        if 'trans' in components:
+            await components['trans'].close()
+        if components.get('image_cache'):
+            await components['image_cache'].close()
+        logger.info("JavBus搜索插件已停止")
+
+    def _build_api(self) -> "JavBusAPI":
+        config = self.config
+        return JavBusAPI(
+            self.javbus_api_url,
+            cache=self._build_cache(),
+            store=self._build_store(),
+            star_index=self.star_index,
+            star_search_pages=config.get("star_search_pages", 3),
+            max_concurrency=config.get("max_concurrency", 4),
+            transport=TransportConfig.from_config(config),
+            backend_options={
+                'failure_threshold': config.get("backend_failure_threshold", 3),
+                'cooldown': config.get("backend_cooldown", 30),
+                'probe_interval': config.get("backend_probe_interval", 15),
+            },
+            hedge=HedgePolicy.from_config(config),
+            upstream_budget=self.limiter.acquire_upstream if self.limiter else None
+        )
+
+    def _build_cache(self) -> Optional[ResponseCache]:
+        """根据配置创建响应缓存，未启用时返回None"""
+        if not self.config.get("cache_enabled", True):
+            logger.info("响应缓存未启用")
+            return None
+        cache = ResponseCache(
+            max_entries=self.config.get("cache_max_entries", 1024),
+            ttls={
+                'detail': self.config.get("cache_ttl_detail", 86400),
+                'search': self.config.get("cache_ttl_search", 600),
+                'movies': self.config.get("cache_ttl_search", 600),
+                'magnets': self.config.get("cache_ttl_magnets", 3600),
+                'star': self.config.get("cache_ttl_detail", 86400),
+            },
+            stale_ttl=self.config.get("cache_stale_ttl", 600)
+        )
+        logger.info(f"响应缓存已启用，容量: {cache.max_entries}，TTL: {cache.ttls}")
+        return cache
+
+    def _build_image_cache(self) -> Optional[ImageCache]:
+        """根据配置创建本地图片缓存，未启用时返回None"""
+        if not self.config.get("image_cache_enabled", False):
+            return None
+        try:
+            return ImageCache(
+                os.path.join(self.data_dir, "images"),
+                max_bytes=self.config.get("image_cache_max_mb", 200) * 1024 * 1024,
+                max_dimension=self.config.get("image_max_dimension", 800),
+                quality=self.config.get("image_quality", 80),
+                concurrency=self.config.get("max_concurrency", 4)
+            )
+        except OSError as e:
+            logger.error(f"图片缓存目录创建失败: {str(e)}")
+            return None
+
+    def _build_subscriptions(self) -> Optional[SubscriptionManager]:
+        """根据配置创建订阅管理器，未启用时返回None"""
+        if not self.config.get("subscribe_enabled", True):
+            return None
+        return SubscriptionManager(
+            self.api,
+            os.path.join(self.data_dir, "subscriptions.json"),
+            notify=self._push_new_movies,
+            interval=self.config.get("subscribe_interval", 1800),
+            max_pages=self.config.get("subscribe_max_pages", 3),
+            max_per_origin=self.config.get("subscribe_max_per_session", 20)
+        )
+
+    def _build_store(self) -> Optional[MetadataStore]:
+        """根据配置打开本地元数据存储，未启用或打开失败时返回None"""
+        if not self.config.get("store_enabled", True):
+            logger.info("本地元数据存储未启用")
+            return None
+        max_age = {
+            'movies': self.config.get("store_max_age_detail", 604800),
+            'magnets': self.config.get("store_max_age_magnets", 86400),
+            'stars': self.config.get("store_max_age_star", 604800),
+        }
+        if self.config.get("cache_enabled", True):
+            # 新鲜期不超过对应的缓存TTL，否则缓存过期后的刷新只会重读同一行，cache_ttl_* 不再生效
+            cache_ttls = {
+                'movies': self.config.get("cache_ttl_detail", 86400),
+                'magnets': self.config.get("cache_ttl_magnets", 3600),
+                'stars': self.config.get("cache_ttl_detail", 86400),
+            }
+            max_age = {table: min(age, cache_ttls[table]) for table, age in max_age.items()}
+        try:
+            return MetadataStore(os.path.join(self.data_dir, "metadata.db"), max_age=max_age)
+        except Exception as e:
+            logger.error(f"本地元数据存储打开失败: {str(e)}")
+            return None
 
     async def send_reply(
             self,
             event: AstrMessageEvent,
             content: List[str],
             screenshots: List[str] = None,
-            use_forward: bool = True
+            use_forward: bool = True,
+            max_items: int = 10
     ) -> AsyncGenerator[MessageEventResult, Any]:
         """统一消息发送方法"""
         sender_id = event.get_sender_id()
@@ -48,10 +304,10 @@ class JavBusSerach(Star):
         if use_forward:
             logger.info("使用AstrBot自带合并转发功能")
             # 无论群组还是私聊，都使用合并转发功能
-            async for msg in self._send_forward_messages(event, content[:10], screenshots[:10]):
+            async for msg in self._send_forward_messages(event, content[:max_items], screenshots[:max_items]):
                 yield msg
-            if len(content) > 10:
-                logger.info(f"结果过多，已显示前10条，共 {len(content)} 条结果")
+            if len(content) > max_items:
+                logger.info(f"结果过多，已显示前{max_items}条，共 {len(content)} 条结果")
         else:
             logger.info("使用普通消息回复模式")
             async for msg in self._send_normal_messages(event, content):
@@ -66,7 +322,7 @@ class JavBusSerach(Star):
     ) -> AsyncGenerator[MessageEventResult, Any]:
         """发送普通消息"""
         for idx, message in enumerate(content, 1):
-            logger.debug(f"发送第 {idx}/{len(content)} 条消息: {message[:50]}...")
+            logger.debug("发送第 %d/%d 条消息: %.50s...", idx, len(content), message)
             yield event.plain_result(message)
         
     async def _send_forward_messages(
@@ -79,163 +335,493 @@ class JavBusSerach(Star):
         uin = int(event.get_self_id())
         bot_name = "CloudCrane Bot"
         messages = []
+
+        if self.image_cache and screenshots:
+            # 并发预取图片到本地缓存，失败的保留原始URL
+            with self.metrics.timer('javbus_stage_seconds', stage='image'):
+                screenshots = await self.image_cache.fetch_many(screenshots[:len(content)])
         
-        # 为每个搜索结果创建一个独立的消息
-        for idx, message in enumerate(content):
-            # 创建一条消息，包含文本和图片
-            message_content = [comp.Plain(str(message))]
-            if idx < len(screenshots):
-                url = screenshots[idx]
-                message_content.append(comp.Image.fromURL(url))
-            
-            # 将这条消息添加到列表中
-            messages.append(
-                comp.Node(
-                    uin=uin,
-                    name=bot_name,
-                    content=message_content
+        with self.metrics.timer('javbus_stage_seconds', stage='reply'):
+            # 为每个搜索结果创建一个独立的消息
+            for idx, message in enumerate(content):
+                # 创建一条消息，包含文本和图片
+                message_content = [comp.Plain(str(message))]
+                if idx < len(screenshots) and screenshots[idx]:
+                    url = screenshots[idx]
+                    if url.startswith(('http://', 'https://')):
+                        message_content.append(comp.Image.fromURL(url))
+                    else:
+                        message_content.append(comp.Image.fromFileSystem(url))
+
+                # 将这条消息添加到列表中
+                messages.append(
+                    comp.Node(
+                        uin=uin,
+                        name=bot_name,
+                        content=message_content
+                    )
                 )
-            )
-        
-        # 使用Nodes组件创建一个合并转发，包含所有消息
-        merged_forward = comp.Nodes(messages)
+
+            # 使用Nodes组件创建一个合并转发，包含所有消息
+            merged_forward = comp.Nodes(messages)
         
         logger.info(f"创建了1个合并转发，包含 {len(messages)} 条消息")
         yield event.chain_result([merged_forward])
 
+    async def _admit(self, event: AstrMessageEvent) -> bool:
+        """搜索命令准入控制，未启用限流时总是放行"""
+        if self.limiter is None:
+            return True
+        return await self.limiter.admit(event.get_sender_id(), event.get_group_id())
+
+    async def _translate_results(self, movies: List[Movie]) -> Dict[str, str]:
+        """批量翻译搜索结果的标题和标签，未开启或失败时返回空映射"""
+        if not self.translate_results:
+            return {}
+        texts = []
+        for movie in movies:
+            texts.append(movie.title)
+            texts.extend(movie.tags)
+        try:
+            with self.metrics.timer('javbus_stage_seconds', stage='translate'):
+                translated = await self.trans.translate_many(texts, to_lang='zh')
+        except Exception as e:
+            logger.error(f"搜索结果翻译失败: {str(e)}")
+            return {}
+        return {text: result for text, result in zip(texts, translated) if result}
+
     # 将 www.javbus.com 替换为 self.javbus_image_proxy
     async def proxy_image(self, image_url: str):
         """将图片URL替换为代理地址"""
-        logger.debug(f"原始图片URL: {image_url}")
-        if self.javbus_image_proxy:
-            proxy_url = image_url.replace("https://www.javbus.com", self.javbus_image_proxy)
-            logger.debug(f"代理后图片URL: {proxy_url}")
-            return proxy_url
-        else:
-            logger.warning("未配置图片代理，使用原始URL")
-            return image_url
+        with self.metrics.timer('javbus_stage_seconds', stage='image'):
+            logger.debug("原始图片URL: %s", image_url)
+            if self.javbus_image_proxy:
+                proxy_url = image_url.replace("https://www.javbus.com", self.javbus_image_proxy)
+                logger.debug("代理后图片URL: %s", proxy_url)
+                return proxy_url
+            else:
+                logger.warning("未配置图片代理，使用原始URL")
+                return image_url
 
-    async def _extract_keyword(self, event: AstrMessageEvent, command: str) -> str:
-        """从消息中提取关键词
-        
-        Args:
-            event: 消息事件
-            command: 命令前缀（如"搜关键词"、"搜演员"、"搜磁力"）
-            
-        Returns:
-            提取的关键词
-        """
-        logger.info(f"开始提取关键词，命令: {command}")
-        messages = event.get_messages()
-        result1 = str(messages[0])
-        logger.debug(f"原始消息内容: {result1}")
-        result2 = re.findall(r"text='(.*?)'", result1)[0]
-        logger.debug(f"提取的文本部分: {result2}")
-        keyword = result2.split(command)[1]
-        keyword = keyword.strip()
-        logger.info(f"提取完成，关键词: {keyword}")
-        return keyword
-
-    @filter.regex(r"^搜关键词(.+)", flags=re.IGNORECASE, priority=1)
-    async def search_movies(self, event: AstrMessageEvent) -> AsyncGenerator[MessageEventResult, Any]:
+    @filter.event_message_type(filter.EventMessageType.ALL)
+    async def on_message(self, event: AstrMessageEvent) -> AsyncGenerator[MessageEventResult, Any]:
+        """统一命令入口：解析一次纯文本，按前缀分发到对应命令"""
+        self._start_background()
+        started = time.perf_counter()
+        command = self.router.parse(message_text(event))
+        if command is None:
+            return
+        # 只统计命中命令的消息，普通聊天消息不产生指标开销
+        self.metrics.observe('javbus_stage_seconds', time.perf_counter() - started, stage='parse')
+        self.metrics.inc('javbus_commands_total', command=command.name)
+        await self._ready()
+        logger.info(f"收到命令: {command.name}，参数: {command.arg}")
+        handler = self._handlers[command.name]
+        with self.metrics.timer('javbus_command_seconds', command=command.name):
+            async for msg in handler(event, command.arg):
+                yield msg
+
+    async def search_movies(self, event: AstrMessageEvent, keyword: str) -> AsyncGenerator[MessageEventResult, Any]:
         try:
-            keyword = await self._extract_keyword(event, "搜关键词")
             if not keyword:
                 logger.warning("搜索关键词为空")
                 yield event.plain_result("请输入搜索关键词")
                 return
 
+            if not await self._admit(event):
+                yield event.plain_result("请求过于频繁，请稍后再试")
+                return
+
             logger.info(f"用户 {event.get_sender_id()} 在群组 {event.get_group_id()} 搜索影片: {keyword}")
 
-            logger.info(f"开始调用搜索API，关键词: {keyword}")
-            datas = await self.api.search_movies(keyword=keyword)
-            logger.info(f"搜索完成，找到 {len(datas.get('movies', []))} 个结果")
+            async for msg in self._send_movie_page(event, keyword, page=1, offset=0):
+                yield msg
 
-            if not datas.get("movies"):
-                logger.info("未找到匹配的影片")
-                yield event.plain_result("没有找到相关影片")
-                return
+        except BudgetExhausted:
+            yield event.plain_result("请求过于频繁，请稍后再试")
+        except Exception as e:
+            logger.error(f"搜索失败: {str(e)}", exc_info=True)
+            yield event.plain_result("搜索服务暂时不可用")
 
-            movies_info = []
-            screenshots = []
-            for idx, data in enumerate(datas["movies"]):
-                logger.info(f"处理第 {idx + 1}/{len(datas['movies'])} 个结果: {data.get('id')}")
-                title = data['title'][:20] + "..." if len(data['title']) > 20 else data['title']
-                movies_info.append(
-                    f"番号: {data['id']}\n"
-                    f"标题: {title}\n"
-                    f"日期: {data['date']}\n"
-                    f"标签: {', '.join(data['tags'])}\n"
-                )
-                screenshots.append(await self.proxy_image(data['img']))
+    async def next_page(self, event: AstrMessageEvent, _: str = "") -> AsyncGenerator[MessageEventResult, Any]:
+        try:
+            cursor = self._get_cursor(event)
+            if cursor is None:
+                yield event.plain_result("没有可翻页的搜索结果，请先使用搜关键词")
+                return
 
-            movies_info.append(f"找到 {len(datas['movies'])} 个结果")
-            logger.info(f"准备返回 {len(movies_info)} 条消息")
+            keyword, page, offset = cursor
+            # 偏移不为0时在已取回的页内翻页，结果来自响应缓存，不计入用户/群限流；
+            # 缓存已过期需要重新请求时仍受全局上游预算约束
+            if offset == 0 and not await self._admit(event):
+                yield event.plain_result("请求过于频繁，请稍后再试")
+                return
 
-            # 使用统一的send_reply方法发送消息，包含截图
-            async for msg in self.send_reply(event, movies_info, screenshots):
+            logger.info(f"用户 {event.get_sender_id()} 翻页: {keyword} 第 {page} 页，偏移 {offset}")
+            async for msg in self._send_movie_page(event, keyword, page, offset):
                 yield msg
-                
-        except IndexError as e:
-            logger.error(f"消息格式错误: {str(e)}")
-            yield event.plain_result("消息格式错误，请按照正确格式输入")
+
+        except BudgetExhausted:
+            yield event.plain_result("请求过于频繁，请稍后再试")
         except Exception as e:
-            logger.error(f"搜索失败: {str(e)}", exc_info=True)
+            logger.error(f"翻页失败: {str(e)}", exc_info=True)
             yield event.plain_result("搜索服务暂时不可用")
 
-    @filter.regex(r"^搜演员(.+)")
-    async def search_star(self, event: AstrMessageEvent) -> AsyncGenerator[MessageEventResult, Any]:
+    async def show_status(self, event: AstrMessageEvent, arg: str = "") -> AsyncGenerator[MessageEventResult, Any]:
+        """管理员查看插件运行指标：默认输出摘要，参数为 prom 时输出Prometheus文本格式"""
+        if not event.is_admin():
+            yield event.plain_result("仅管理员可查看插件状态")
+            return
+        self._export_gauges()
+        if arg.lower() in ("prom", "prometheus"):
+            yield event.plain_result(self.metrics.render())
+            return
+        yield event.plain_result(self._status_summary())
+
+    def _export_gauges(self) -> None:
+        """把各组件的统计快照写入仪表，随指标一起导出"""
+        for name, value in self.api.cache_stats().items():
+            self.metrics.set('javbus_cache', value, kind=name)
+        for name, value in self.trans.cache.stats().items():
+            self.metrics.set('javbus_translate_cache', value, kind=name)
+        for url, stats in self.api.backend_stats().items():
+            self.metrics.set('javbus_backend_healthy', 1 if stats['healthy'] else 0, backend=url)
+            self.metrics.set('javbus_backend_ewma_seconds', stats['ewma_ms'] / 1000, backend=url)
+        if self.limiter:
+            for name, value in self.limiter.stats().items():
+                self.metrics.set('javbus_admission', value, kind=name)
+        for service, stats in self.trans.breaker_stats().items():
+            self.metrics.set('javbus_breaker_state', CircuitBreaker.STATES.index(stats['state']), service=service)
+            for name in ('successes', 'failures', 'short_circuits', 'opens'):
+                self.metrics.set('javbus_breaker', stats[name], service=service, kind=name)
+        hedge = self.api.hedge_stats()
+        if hedge:
+            for name in ('requests', 'hedges', 'hedge_wins', 'budget_denied'):
+                self.metrics.set('javbus_hedge', hedge[name], kind=name)
+            for endpoint, delay_ms in hedge['delays_ms'].items():
+                self.metrics.set('javbus_hedge_delay_seconds', delay_ms / 1000, endpoint=endpoint)
+
+    def _status_summary(self) -> str:
+        lines = ["【JavBus 插件状态】"]
+        commands = self.metrics.counter('javbus_commands_total')
+        if commands:
+            lines.append("命令: " + "，".join(f"{dict(k)['command']}={int(v)}" for k, v in sorted(commands.items())))
+
+        lines.append("阶段耗时(p50/p95，按分桶上界估算):")
+        for stage in ('parse', 'translate', 'upstream', 'image', 'reply'):
+            p50 = self.metrics.quantile('javbus_stage_seconds', 0.5, stage=stage)
+            if p50 is None:
+                continue
+            p95 = self.metrics.quantile('javbus_stage_seconds', 0.95, stage=stage)
+            lines.append(f"  {stage}: ≤{p50 * 1000:g}ms / ≤{p95 * 1000:g}ms")
+
+        upstream = self.metrics.counter('javbus_upstream_requests_total')
+        if upstream:
+            lines.append("上游请求: " + "，".join(
+                f"{dict(k)['endpoint']}[{dict(k)['status']}]={int(v)}" for k, v in sorted(upstream.items())))
+        if self.api.cache is not None:
+            lines.append(f"响应缓存: {self.api.cache_stats()}")
+        lines.append(f"请求合并: {self.api.inflight_stats()}")
+        if self.limiter:
+            lines.append(f"限流: {self.limiter.stats()}")
+        lines.append(f"翻译缓存: {self.trans.cache.stats()}")
+        lines.append("翻译熔断: " + "，".join(
+            f"{service}={stats['state']}(失败{stats['failures']}/熔断{stats['opens']}/拒绝{stats['short_circuits']})"
+            for service, stats in self.trans.breaker_stats().items()))
+        if self.api.hedge_stats():
+            lines.append(f"对冲请求: {self.api.hedge_stats()}")
+        lines.append(f"渲染缓存: {self.renderer.stats()}")
+        if self.image_cache:
+            lines.append(f"图片缓存: {self.image_cache.stats()}")
+        if self.prewarmer:
+            lines.append(f"预热: {self.prewarmer.stats()}")
+        if self.subscriptions:
+            lines.append(f"订阅: {self.subscriptions.stats()}")
+        lines.append("发送“javbus状态 prom”获取Prometheus格式指标")
+        return "\n".join(lines)
+
+    async def subscribe(self, event: AstrMessageEvent, arg: str) -> AsyncGenerator[MessageEventResult, Any]:
+        try:
+            if self.subscriptions is None:
+                yield event.plain_result("订阅功能未启用")
+                return
+            kind, value = parse_kind(arg)
+            if kind is None or not value:
+                yield event.plain_result(
+                    f"用法: 订阅 类型 名称，类型可选 {'/'.join(KIND_NAMES.values())}，例如：订阅 演员 三上悠亚")
+                return
+
+            title = value
+            if kind in ID_KINDS:
+                # javbus-api 按ID过滤，名称无法直接使用
+                value, title = parse_filter_id(value)
+                if value is None:
+                    yield event.plain_result(
+                        f"{KIND_NAMES[kind]}需按ID订阅，ID见JavBus页面地址，"
+                        f"如 https://www.javbus.com/genre/4 中的 4\n例如：订阅 类别 4 巨乳（名称可省略，仅用于显示）")
+                    return
+                title = title or value
+
+            if not await self._admit(event):
+                yield event.plain_result("请求过于频繁，请稍后再试")
+                return
+
+            if kind == 'star':
+                # 演员按ID订阅，名称只用于显示
+                star_id = await self._resolve_star_id(value)
+                if not star_id:
+                    yield event.plain_result("未找到该演员")
+                    return
+                value = star_id
+
+            origin = event.unified_msg_origin
+            sub, message = await self.subscriptions.add(origin, kind, value, title)
+            if sub is None:
+                yield event.plain_result(message)
+                return
+            logger.info(f"会话 {origin} 订阅 {sub.describe()}")
+            await self.subscriptions.prime(sub)
+            yield event.plain_result(f"{message}：{sub.describe()}，有新片时会推送到这里")
+
+        except BudgetExhausted:
+            yield event.plain_result("请求过于频繁，请稍后再试")
+        except Exception as e:
+            logger.error(f"订阅失败: {str(e)}", exc_info=True)
+            yield event.plain_result("订阅服务异常")
+
+    async def unsubscribe(self, event: AstrMessageEvent, arg: str) -> AsyncGenerator[MessageEventResult, Any]:
+        if self.subscriptions is None:
+            yield event.plain_result("订阅功能未启用")
+            return
+        kind, value = parse_kind(arg)
+        if kind is None or not value:
+            yield event.plain_result("用法: 取消订阅 类型 名称，例如：取消订阅 演员 三上悠亚")
+            return
+        if await self.subscriptions.remove(event.unified_msg_origin, kind, value):
+            yield event.plain_result(f"已取消订阅：{KIND_NAMES[kind]} {value}")
+        else:
+            yield event.plain_result("没有找到该订阅，发送“订阅列表”查看当前订阅")
+
+    async def list_subscriptions(self, event: AstrMessageEvent, _: str = "") -> AsyncGenerator[MessageEventResult, Any]:
+        if self.subscriptions is None:
+            yield event.plain_result("订阅功能未启用")
+            return
+        subs = self.subscriptions.for_origin(event.unified_msg_origin)
+        if not subs:
+            yield event.plain_result("当前会话没有订阅")
+            return
+        lines = ["【当前订阅】"] + [f"{idx}. {sub.describe()}" for idx, sub in enumerate(subs, 1)]
+        yield event.plain_result("\n".join(lines))
+
+    async def magnet_preference(self, event: AstrMessageEvent, arg: str = "") -> AsyncGenerator[MessageEventResult, Any]:
+        """查看或设置当前用户的磁力排序偏好"""
+        user_id = event.get_sender_id()
+        if not arg:
+            current = self.magnet_prefs.get(user_id)
+            source = "自定义" if self.magnet_prefs.has(user_id) else "默认"
+            yield event.plain_result(
+                f"当前磁力偏好（{source}）：{current.describe()}\n"
+                f"设置示例：磁力偏好 字幕 高清 小体积 上限5G；发送“磁力偏好 重置”恢复默认")
+            return
+        if arg in ("重置", "默认"):
+            await self.magnet_prefs.reset(user_id)
+            yield event.plain_result(f"已恢复默认磁力偏好：{self.magnet_prefs.default.describe()}")
+            return
+
+        pref, unknown = parse_preference(arg, self.magnet_prefs.default)
+        if pref is None:
+            yield event.plain_result(f"无法识别的偏好：{' '.join(unknown)}\n可选：高清 字幕 大体积 小体积 最新 上限5G")
+            return
+        await self.magnet_prefs.set(user_id, pref)
+        logger.info(f"用户 {user_id} 设置磁力偏好: {pref.describe()}")
+        reply = f"磁力偏好已保存：{pref.describe()}"
+        if unknown:
+            reply += f"\n已忽略：{' '.join(unknown)}"
+        yield event.plain_result(reply)
+
+    async def _resolve_star_id(self, name: str) -> Optional[str]:
+        """演员名称 -> 演员ID，优先查本地索引"""
+        star_id = self.star_index.resolve(name)
+        if star_id:
+            return star_id
+        with self.metrics.timer('javbus_stage_seconds', stage='translate'):
+            translated = await self.trans.translate(name)
+        data = await self.api.get_star_by_name(translated)
+        if not data:
+            return None
+        self.star_index.add(data.id, name, alias=True)
+        return data.id
+
+    async def _push_new_movies(self, origin: str, sub: Subscription, movies: List[Movie]) -> None:
+        """向订阅会话推送新片列表"""
+        lines = [f"【订阅更新】{sub.describe()} 有 {len(movies)} 部新片："]
+        lines.extend(self.renderer.push(movie) for movie in movies[:self.display_limit])
+        if len(movies) > self.display_limit:
+            lines.append(f"……共 {len(movies)} 部")
+        lines.append("发送“搜磁力番号”查看详情")
+        await self.context.send_message(origin, MessageChain().message("\n".join(lines)))
+
+    def _cursor_key(self, event: AstrMessageEvent) -> str:
+        return f"{event.get_group_id() or 'private'}:{event.get_sender_id()}"
+
+    def _get_cursor(self, event: AstrMessageEvent) -> Optional[Tuple[str, int, int]]:
+        """获取用户的翻页游标，过期返回None"""
+        key = self._cursor_key(event)
+        entry = self._cursors.get(key)
+        if entry is None:
+            return None
+        keyword, page, offset, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._cursors[key]
+            return None
+        return keyword, page, offset
+
+    def _set_cursor(self, event: AstrMessageEvent, cursor: Optional[Tuple[str, int, int]]) -> None:
+        key = self._cursor_key(event)
+        if cursor is None:
+            self._cursors.pop(key, None)
+            return
+        self._cursors[key] = (*cursor, time.monotonic() + self.cursor_ttl)
+        self._cursors.move_to_end(key)
+        while len(self._cursors) > 1000:
+            self._cursors.popitem(last=False)
+
+    async def _send_movie_page(
+            self,
+            event: AstrMessageEvent,
+            keyword: str,
+            page: int,
+            offset: int
+    ) -> AsyncGenerator[MessageEventResult, Any]:
+        """发送一屏搜索结果
+
+        只处理显示范围内的结果；分块模式下每处理完一块就发送一条合并转发。
+        发送后记录翻页游标，供“下一页”使用。
+        """
+        logger.info(f"开始调用搜索API，关键词: {keyword}，第 {page} 页")
+        datas = await self.api.search_movies(keyword=keyword, page=page)
+        movies = datas.movies
+        logger.info(f"搜索完成，找到 {len(movies)} 个结果")
+
+        if offset >= len(movies):
+            logger.info("未找到匹配的影片")
+            self._set_cursor(event, None)
+            yield event.plain_result("没有找到相关影片" if page == 1 and offset == 0 else "没有更多结果了")
+            return
+
+        shown = movies[offset:offset + self.display_limit]
+        end = offset + len(shown)
+        if end < len(movies):
+            cursor = (keyword, page, end)
+        elif datas.has_next:
+            cursor = (keyword, page + 1, 0)
+        else:
+            cursor = None
+        self._set_cursor(event, cursor)
+
+        summary = f"第 {page} 页，显示第 {offset + 1}-{end} 条，本页共 {len(movies)} 条"
+        if cursor:
+            summary += "，发送“下一页”查看更多"
+
+        chunk_size = self.reply_chunk_size if self.progressive_reply else len(shown)
+        movies_info: List[str] = []
+        screenshots: List[str] = []
+        for start in range(0, len(shown), chunk_size):
+            chunk = shown[start:start + chunk_size]
+            translations = await self._translate_results(chunk)
+            for idx, movie in enumerate(chunk, offset + start + 1):
+                logger.info(f"处理第 {idx}/{len(movies)} 个结果: {movie.id}")
+                movies_info.append(self.renderer.movie(movie, translations))
+                screenshots.append(await self.proxy_image(movie.img))
+
+            if start + chunk_size >= len(shown):
+                movies_info.append(summary)
+            if self.progressive_reply:
+                # 分块发送：当前块处理完立即发出
+                logger.info(f"分块发送第 {start // chunk_size + 1} 块，共 {len(movies_info)} 条")
+                async for msg in self._send_forward_messages(event, movies_info, screenshots):
+                    yield msg
+                movies_info, screenshots = [], []
+
+        if not self.progressive_reply:
+            logger.info(f"准备返回 {len(movies_info)} 条消息")
+            # 使用统一的send_reply方法发送消息，包含截图
+            async for msg in self.send_reply(event, movies_info, screenshots, max_items=len(movies_info)):
+                yield msg
+
+    async def search_star(self, event: AstrMessageEvent, keyword: str) -> AsyncGenerator[MessageEventResult, Any]:
         try:
-            keyword = await self._extract_keyword(event, "搜演员")
             if not keyword:
                 logger.warning("演员搜索关键词为空")
                 yield event.plain_result("请输入演员名称")
                 return
 
+            if not await self._admit(event):
+                yield event.plain_result("请求过于频繁，请稍后再试")
+                return
+
             logger.info(f"用户 {event.get_sender_id()} 在群组 {event.get_group_id()} 搜索演员: {keyword}")
 
-            logger.info(f"开始调用演员搜索API: {keyword}")
-            translated_keyword = await self.trans.translate(keyword)
-            data = await self.api.get_star_by_name(translated_keyword)
-            logger.info(f"演员搜索结果: {data}")
+            star_id = self.star_index.resolve(keyword)
+            if star_id:
+                logger.info(f"本地演员索引命中: {keyword} -> {star_id}")
+                data = await self.api.get_star_detail(star_id)
+            else:
+                logger.info(f"开始调用演员搜索API: {keyword}")
+                with self.metrics.timer('javbus_stage_seconds', stage='translate'):
+                    translated_keyword = await self.trans.translate(keyword)
+                data = await self.api.get_star_by_name(translated_keyword)
+                if data:
+                    # 记录用户输入和译文为别名，下次直接从本地索引解析
+                    self.star_index.add(data.id, keyword, alias=True)
+                    if translated_keyword:
+                        self.star_index.add(data.id, translated_keyword, alias=True)
+            logger.debug("演员搜索结果: %s", data)
 
             if not data:
                 logger.info("未找到演员信息")
-                yield event.plain_result("未找到该演员信息")
+                reply = "未找到该演员信息"
+                # 本地索引的模糊匹配只作为提示
+                hints = [hint for _, hint, _ in self.star_index.lookup(keyword, limit=3) if hint]
+                if hints:
+                    reply += f"\n你是否要找：{'、'.join(hints)}"
+                yield event.plain_result(reply)
                 return
 
-            star_info = []
-            screenshots = []
-
-            star_info = [
-                f"姓名: {data['name']}\n"
-                f"生日: {data['birthday']}\n"
-                f"年龄: {data['age']}\n"
-                f"身高: {data['height']}\n"
-                f"三维: {data['bust']} - {data['waistline']} - {data['hipline']}\n"
-            ]
-            screenshots.append(await self.proxy_image(data['avatar']))
-            logger.info(f"演员信息已构建: {data['name']}")
+            star_info = [self.renderer.star(data)]
+            screenshots = [await self.proxy_image(data.avatar)]
+            logger.info(f"演员信息已构建: {data.name}")
 
             # 使用统一的send_reply方法发送消息，包含截图
             async for msg in self.send_reply(event, star_info, screenshots):
                 yield msg
                 
-        except IndexError as e:
-            logger.error(f"消息格式错误: {str(e)}")
-            yield event.plain_result("消息格式错误，请按照正确格式输入")
+        except BudgetExhausted:
+            yield event.plain_result("请求过于频繁，请稍后再试")
         except Exception as e:
             logger.error(f"演员搜索失败: {str(e)}", exc_info=True)
             yield event.plain_result("演员查询服务异常")
 
-    @filter.regex(r"^搜磁力([a-zA-Z0-9-]+)")
-    async def search_magnet(self, event: AstrMessageEvent) -> AsyncGenerator[MessageEventResult, Any]:
+    async def search_magnet(self, event: AstrMessageEvent, keyword: str) -> AsyncGenerator[MessageEventResult, Any]:
         try:
-            keyword = await self._extract_keyword(event, "搜磁力")
+            movie_ids = split_movie_ids(keyword)
+            if not movie_ids:
+                yield event.plain_result("请输入番号")
+                return
+            if not await self._admit(event):
+                yield event.plain_result("请求过于频繁，请稍后再试")
+                return
+
+            if len(movie_ids) > 1:
+                async for msg in self._search_magnets_bulk(event, movie_ids):
+                    yield msg
+                return
+            keyword = movie_ids[0]
+
             logger.info(f"用户 {event.get_sender_id()} 在群组 {event.get_group_id()} 搜索磁力: {keyword}")
 
-            logger.info(f"开始获取影片详情: {keyword}")
-            detail = await self.api.get_movie_detail(keyword)
+            logger.info(f"开始获取影片详情及磁力链接: {keyword}")
+            detail, all_magnets, timings = await self._get_movie_with_magnets(keyword)
             logger.info(f"影片详情获取完成，结果: {'找到' if detail else '未找到'}")
 
             if not detail:
@@ -243,111 +829,195 @@ class JavBusSerach(Star):
                 yield event.plain_result("没有找到该影片")
                 return
 
-            if isinstance(detail.get("videoLength"), int):
-                try:
-                    hours = detail["videoLength"] // 60
-                    minutes = detail["videoLength"] % 60
-                    videoLength = f"{hours}小时{minutes}分钟"
-                    logger.info(f"计算影片时长: {detail['videoLength']}分钟 -> {videoLength}")
-                except Exception as e:
-                    logger.error(f"时长计算错误: {str(e)}")
-                    videoLength = str(detail.get("videoLength", "未知"))
-            else:
-                videoLength = str(detail.get("videoLength", "未知"))
+            info_lines = [self.renderer.detail(detail)]
+            screenshots = [await self.proxy_image(detail.img)]
 
-            stars_str = "暂无演员信息"
-            if detail.get("stars"):
-                try:
-                    stars = [s["name"] if isinstance(s, dict) else str(s) for s in detail["stars"][:3]]
-                    stars_str = "、".join(stars)
-                    if len(detail["stars"]) > 3:
-                        stars_str += f" 等{len(detail['stars'])}人"
-                    logger.info(f"处理演员信息完成: {stars_str}")
-                except Exception as e:
-                    logger.error(f"演员信息处理失败: {str(e)}")
-                    stars_str = "演员信息解析错误"
-
-            director_str = "未知"
-            if isinstance(detail.get("director"), dict):
-                director_str = detail["director"].get("name", "未知")
-            elif detail.get("director"):
-                director_str = str(detail["director"])
-            logger.info(f"导演信息: {director_str}")
-
-            screenshots = []
-
-            info_lines = [
-                f"【影片详情】\n"
-                f"番号：{detail.get('id', 'N/A')}\n"
-                f"标题：{detail.get('title', 'N/A')}\n"
-                f"日期：{detail.get('date', 'N/A')}\n"
-                f"时长：{videoLength}\n"
-                f"演员：{stars_str}\n"
-                f"导演：{director_str}"
-            ]
-            screenshots.append(await self.proxy_image(detail['img']))
-
-            magnets = []
-            if 'gid' in detail and 'uc' in detail:
-                try:
-                    logger.info(f"开始获取磁力链接: gid={detail['gid']}, uc={detail['uc']}")
-                    all_magnets = await self.api.get_magnets(
-                        movie_id=keyword,
-                        gid=detail['gid'],
-                        uc=detail['uc']
-                    )
-                    magnets = all_magnets[:5]  # 获取前5条磁力链接
-                    logger.info(f"获取到 {len(magnets)} 条磁力链接")
-                except Exception as e:
-                    logger.error(f"磁力链接获取失败: {str(e)}", exc_info=True)
-            else:
-                logger.warning("缺少获取磁力链接的必要参数")
+            # 按用户偏好打分、去重，同一份缓存的磁力列表对同一偏好只排序一次
+            magnets = rank_magnets(all_magnets, self.magnet_prefs.get(event.get_sender_id()))
+            magnets = magnets[:self.magnet_display_count]
+            logger.info(f"获取到 {len(all_magnets)} 条磁力链接，显示 {len(magnets)} 条")
 
             if magnets:
                 info_lines.append("【磁力链接】")
-                for idx, magnet in enumerate(magnets, 1):
-                    title = magnet['title']
-                    size = magnet['size']
-                    share_date = magnet['shareDate']
-                    is_hd = magnet['isHD']
-                    link = magnet['link']
-                    has_sub = magnet['hasSubtitle']
-
-                    info_lines.append(
-                        f"{idx}. {title} {size}\n"
-                        f"{share_date}\n"
-                        f"{' 高清' if is_hd else ''} 字幕：{'有' if has_sub else '无'}\n"
-                        f"{link}"
-                    )
+                info_lines.extend(self.renderer.magnet(idx, magnet) for idx, magnet in enumerate(magnets, 1))
             else:
                 info_lines.append("【未找到磁力链接】")
                 logger.info("未找到磁力链接")
 
-            logger.info(f"准备返回磁力搜索结果，信息行数: {len(info_lines)}")
-            # 使用统一的send_reply方法发送消息，包含截图
-            async for msg in self.send_reply(event, info_lines, screenshots):
+            logger.info(
+                f"准备返回磁力搜索结果，信息行数: {len(info_lines)}，"
+                f"耗时: {', '.join(f'{k}={v * 1000:.0f}ms' for k, v in timings.items())}")
+            # 使用统一的send_reply方法发送消息，包含截图；条数由 magnet_display_count 控制，不再截断
+            async for msg in self.send_reply(event, info_lines, screenshots, max_items=len(info_lines)):
                 yield msg
                 
-        except IndexError as e:
-            logger.error(f"消息格式错误: {str(e)}")
-            yield event.plain_result("消息格式错误，请按照正确格式输入")
+        except BudgetExhausted:
+            yield event.plain_result("请求过于频繁，请稍后再试")
+        except aiohttp.ClientResponseError as e:
+            if e.status != 404:
+                logger.error(f"磁力搜索失败: {str(e)}", exc_info=True)
+                yield event.plain_result("磁力搜索服务异常")
+                return
+            yield event.plain_result("没有找到该影片")
         except Exception as e:
             logger.error(f"磁力搜索失败: {str(e)}", exc_info=True)
             yield event.plain_result("磁力搜索服务异常")
 
+    async def _get_movie_with_magnets(self, movie_id: str) -> Tuple[Optional[MovieDetail], List[Magnet], Dict[str, float]]:
+        """获取影片详情及磁力；规范化后的番号未找到时，再用不带连字符的形式重试（如东京热 n1234）"""
+        compact = compact_movie_id(movie_id)
+        try:
+            result = await self.api.get_movie_with_magnets(movie_id)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 404 or compact is None:
+                raise
+            result = None
+        if compact is not None and (result is None or not result[0]):
+            logger.info(f"未找到 {movie_id}，尝试番号 {compact}")
+            return await self.api.get_movie_with_magnets(compact)
+        return result
+
+    async def _search_magnets_bulk(
+            self,
+            event: AstrMessageEvent,
+            movie_ids: List[str]
+    ) -> AsyncGenerator[MessageEventResult, Any]:
+        """批量查询磁力链接
+
+        按max_concurrency并发获取各番号的详情和磁力，单个番号失败只影响该条结果。
+        结果按完成顺序处理；分块模式下每凑满一块立即发送，否则按输入顺序合并为一条转发。
+        """
+        skipped = movie_ids[self.bulk_magnet_max:]
+        movie_ids = movie_ids[:self.bulk_magnet_max]
+        logger.info(f"用户 {event.get_sender_id()} 在群组 {event.get_group_id()} 批量搜索磁力: {movie_ids}")
+        semaphore = asyncio.Semaphore(self.api.max_concurrency)
+        pref = self.magnet_prefs.get(event.get_sender_id())
+
+        async def fetch(index: int, movie_id: str):
+            async with semaphore:
+                try:
+                    detail, magnets, _ = await self._get_movie_with_magnets(movie_id)
+                    return index, movie_id, detail, magnets, None
+                except BudgetExhausted:
+                    # 交给命令处理器统一回复限流提示
+                    raise
+                except Exception as e:
+                    return index, movie_id, None, [], e
+
+        tasks = [asyncio.ensure_future(fetch(i, movie_id)) for i, movie_id in enumerate(movie_ids)]
+        entries: List[Optional[Tuple[str, str]]] = [None] * len(movie_ids)
+        chunk: List[Tuple[str, str]] = []
+        found = 0
+        try:
+            for future in asyncio.as_completed(tasks):
+                index, movie_id, detail, magnets, error = await future
+                if isinstance(error, aiohttp.ClientResponseError) and error.status == 404:
+                    entries[index] = (f"【{movie_id}】没有找到该影片", "")
+                elif error is not None:
+                    logger.warning(f"批量磁力查询 {movie_id} 失败: {str(error)}")
+                    entries[index] = (f"【{movie_id}】查询失败，请稍后重试", "")
+                elif not detail:
+                    entries[index] = (f"【{movie_id}】没有找到该影片", "")
+                else:
+                    found += 1
+                    entries[index] = (self._format_bulk_entry(detail, rank_magnets(magnets, pref)),
+                                      await self.proxy_image(detail.img) if detail.img else "")
+                if self.progressive_reply:
+                    chunk.append(entries[index])
+                    if len(chunk) >= self.reply_chunk_size:
+                        async for msg in self._send_forward_messages(
+                                event, [text for text, _ in chunk], [image for _, image in chunk]):
+                            yield msg
+                        chunk = []
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        summary = f"共查询 {len(movie_ids)} 个番号，找到 {found} 个"
+        if skipped:
+            summary += f"；一次最多查询 {self.bulk_magnet_max} 个，已忽略: {' '.join(skipped)}"
+        logger.info(summary)
+
+        if self.progressive_reply:
+            chunk.append((summary, ""))
+            async for msg in self._send_forward_messages(
+                    event, [text for text, _ in chunk], [image for _, image in chunk]):
+                yield msg
+            return
+        content = [text for text, _ in entries] + [summary]
+        screenshots = [image for _, image in entries]
+        async for msg in self.send_reply(event, content, screenshots, max_items=len(content)):
+            yield msg
+
+    def _format_bulk_entry(self, detail: MovieDetail, magnets: List[Magnet]) -> str:
+        """批量查询中单个番号的摘要：标题、日期和前3条磁力"""
+        lines = [self.renderer.bulk(detail)]
+        if magnets:
+            lines.extend(self.renderer.magnet(idx, magnet) for idx, magnet in enumerate(magnets[:3], 1))
+        else:
+            lines.append("未找到磁力链接")
+        return "\n".join(lines)
+
 
 class JavBusAPI:
-    def __init__(self, base_url: str = None):
-        self.base_url = base_url.rstrip('/') if base_url else ""
-        logger.info(f"JavBus API初始化成功，基础URL为：{self.base_url}")
+    def __init__(
+            self,
+            base_url: Union[str, List[str], None] = None,
+            cache: Optional[BaseCache] = None,
+            store: Optional[MetadataStore] = None,
+            star_index: Optional[StarIndex] = None,
+            star_search_pages: int = 3,
+            star_candidates: int = 3,
+            max_concurrency: int = 4,
+            transport: Optional[TransportConfig] = None,
+            backend_options: Optional[Dict[str, Any]] = None,
+            hedge: Optional[HedgePolicy] = None,
+            upstream_budget: Optional[Callable[..., Awaitable[None]]] = None
+    ):
+        # 支持多个后端，逗号分隔或列表；base_url保留为首个后端地址
+        self.backends = BackendPool(BackendPool.parse_urls(base_url), **(backend_options or {}))
+        self.base_url = self.backends.backends[0].url if len(self.backends) else ""
+        self.hedge = hedge
+        # 请求上游前调用，扣除全局上游预算；预算用尽时抛出 BudgetExhausted，wait=False 时不排队
+        self.upstream_budget = upstream_budget
+        self.cache = cache
+        self.store = store
+        self.star_index = star_index
+        # 番号 -> (gid, uc)，已知令牌时磁力请求无需等待详情返回
+        self._magnet_tokens: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._magnet_tokens_max = 4096
+
+        # 演员搜索：搜索页数、候选数、并发上限，以及名称 -> 演员ID缓存
+        self.star_search_pages = max(1, int(star_search_pages))
+        self.star_candidates = max(1, int(star_candidates))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._star_name_ids: "OrderedDict[str, str]" = OrderedDict()
+        self._star_name_ids_max = 4096
+        self.inflight = SingleFlight()
+        self.metrics = get_metrics()
+        logger.info(f"JavBus API初始化成功，后端: {[b.url for b in self.backends.backends]}")
         
         # 默认headers
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        # 创建一个可复用的session
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        # 可复用的session在首次请求时于运行中的事件循环内创建
+        self.transport = transport or TransportConfig()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        self._closed = False
+        logger.info(f"JavBus API传输配置: {self.transport}")
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享session，不存在或已关闭时按传输配置创建；close() 之后不再创建"""
+        if self._closed:
+            raise RuntimeError("JavBus API已关闭")
+        if self.session is None or self.session.closed:
+            async with self._session_lock:
+                if self.session is None or self.session.closed:
+                    self.session = self.transport.create_session(self.headers)
+        return self.session
 
     async def __aenter__(self):
         return self
@@ -356,20 +1026,207 @@ class JavBusAPI:
         await self.close()
 
     async def close(self):
-        """关闭session"""
-        if hasattr(self, 'session') and not self.session.closed:
+        """关闭session，取消缓存的后台刷新；关闭后不再创建新的session"""
+        self._closed = True
+        await self.backends.stop_probes()
+        if self.cache is not None:
+            await self.cache.close()
+        if self.session is not None and not self.session.closed:
             await self.session.close()
+        if self.store:
+            self.store.close()
+        if self.star_index is not None:
+            self.star_index.save()
+
+    async def _request(
+            self,
+            path: str,
+            params: Dict = None,
+            endpoint: Optional[str] = None,
+            store_key: Optional[Tuple[str, str]] = None,
+            codec: Optional[Codec] = None
+    ) -> Any:
+        """统一的异步请求方法
+
+        Args:
+            path: 接口路径，如 /api/movies/search
+            params: 查询参数
+            endpoint: 接口类型（detail/search/magnets/movies/star），用于选择缓存TTL，
+                为None时不走缓存
+            store_key: (表名, 键)，指定时先查本地存储，请求成功后写回
+            codec: 指定时把响应解析为紧凑模型，缓存和本地存储中保存的都是模型/紧凑行
+        """
+        key = BaseCache.make_key(path, params)
+
+        async def fetch():
+            # 同一键的并发请求只向上游发起一次
+            return await self.inflight.do(key, lambda: self._load(path, params, store_key, endpoint, codec))
+
+        if self.cache is None or endpoint is None:
+            return await fetch()
+        return await self.cache.get_or_fetch(key, endpoint, fetch)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """缓存命中/未命中/淘汰计数"""
+        return self.cache.stats() if self.cache is not None else {}
+
+    def inflight_stats(self) -> Dict[str, int]:
+        """并发请求合并计数"""
+        return self.inflight.stats()
+
+    def hedge_stats(self) -> Dict[str, object]:
+        """对冲请求计数"""
+        return self.hedge.stats() if self.hedge else {}
+
+    def backend_stats(self) -> Dict[str, Dict[str, object]]:
+        """各后端健康状态与延迟"""
+        return self.backends.stats()
+
+    async def _load(
+            self,
+            path: str,
+            params: Dict = None,
+            store_key: Optional[Tuple[str, str]] = None,
+            endpoint: Optional[str] = None,
+            codec: Optional[Codec] = None
+    ) -> Any:
+        """本地存储 -> 上游API -> 写回本地存储；上游失败时用过期数据兜底"""
+        if self.store is None or store_key is None or codec is None:
+            data = await self._fetch(path, params, endpoint)
+            return codec.from_api(data) if codec else data
+
+        stored = await self.store.get(*store_key)
+        if stored is not None and stored[1]:
+            logger.debug("本地存储命中: %s", store_key)
+            return codec.from_row(stored[0])
+
+        try:
+            data = codec.from_api(await self._fetch(path, params, endpoint))
+        except Exception:
+            if stored is not None:
+                logger.warning(f"上游请求失败，使用本地存储的过期数据: {store_key}")
+                return codec.from_row(stored[0])
+            raise
+
+        if data:
+            await self.store.put(*store_key, codec.to_row(data), name=getattr(data, 'name', None))
+        return data
 
-    async def _request(self, url: str, params: Dict = None) -> Dict:
-        """统一的异步请求方法"""
+    async def _fetch(self, path: str, params: Dict = None, endpoint: Optional[str] = None) -> Dict:
+        """请求上游API，启用对冲且接口适用时走对冲请求"""
+        if not len(self.backends):
+            raise ValueError("未配置JavBus API地址")
+        if self.upstream_budget is not None:
+            await self.upstream_budget()
+        self.backends.start_probes(self._probe)
+
+        order = self.backends.ranked()
+        started = time.perf_counter()
+        with self.metrics.timer('javbus_stage_seconds', stage='upstream'):
+            if self.hedge is not None and self.hedge.applies(endpoint):
+                data = await self._fetch_hedged(order, path, params, endpoint)
+            else:
+                data = await self._fetch_failover(order, path, params, endpoint)
+        if self.hedge is not None:
+            self.hedge.record(endpoint, time.perf_counter() - started)
+        return data
+
+    async def _fetch_hedged(self, order: List[Backend], path: str, params: Dict, endpoint: str) -> Dict:
+        """对冲请求：首发请求超过分位数延迟未返回时，向备用后端再发一次，取先成功者"""
+        self.hedge.start()
+        first = asyncio.ensure_future(self._fetch_failover(order, path, params, endpoint))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge.delay(endpoint))
+        if done or not self.hedge.try_spend():
+            return await first
+        if self.upstream_budget is not None:
+            # 对冲请求同样计入全局上游预算；没有立即可用的预算时不对冲，只等首发请求
+            try:
+                await self.upstream_budget(wait=False)
+            except BudgetExhausted:
+                logger.debug("全局上游预算不足，跳过对冲请求: %s", path)
+                return await first
+
+        # 有多个后端时对冲请求优先发往另一个后端
+        alternate = order[1:] + order[:1] if len(order) > 1 else order
+        logger.info(f"请求超过 {self.hedge.delay(endpoint) * 1000:.0f}ms 未返回，发出对冲请求: {path}")
+        second = asyncio.ensure_future(self._fetch_failover(alternate, path, params, endpoint))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_failover(
+            self,
+            order: List[Backend],
+            path: str,
+            params: Dict = None,
+            endpoint: Optional[str] = None
+    ) -> Dict:
+        """按给定的后端顺序请求上游API，后端故障时自动切换到下一个后端
+
+        网络错误、超时和5xx视为后端故障并触发故障转移；4xx等业务错误直接抛出。
+        """
+        last_error: Optional[BaseException] = None
+        for attempt, backend in enumerate(order):
+            started = self.backends.begin(backend)
+            try:
+                data = await self._fetch_url(backend.url + path, params, endpoint)
+            except aiohttp.ClientResponseError as e:
+                if e.status < 500:
+                    self.backends.end(backend, started, ok=True)
+                    raise
+                self.backends.end(backend, started, ok=False)
+                last_error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.backends.end(backend, started, ok=False)
+                last_error = e
+            except BaseException:
+                # 被取消（如对冲落败）或其它异常，不计入延迟统计
+                self.backends.end(backend, started, ok=None)
+                raise
+            else:
+                self.backends.end(backend, started, ok=True)
+                return data
+            if attempt + 1 < len(order):
+                logger.warning(f"后端 {backend.url} 请求失败，切换到下一个后端")
+        raise last_error
+
+    async def _probe(self, url: str) -> bool:
+        """主动探测后端是否可用"""
+        session = await self._get_session()
+        try:
+            async with session.get(url, proxy=self.transport.proxy) as response:
+                return response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def _fetch_url(self, url: str, params: Dict = None, endpoint: Optional[str] = None) -> Dict:
+        """直接请求上游API"""
         logger.info(f"开始API请求，URL: {url}")
-        logger.debug(f"请求参数: {params}")
+        logger.debug("请求参数: %s", params)
+        session = await self._get_session()
+        endpoint = endpoint or 'other'
+        status = 'error'
+        started = time.perf_counter()
         try:
-            async with self.session.get(url, params=params) as response:
+            async with session.get(url, params=params, proxy=self.transport.proxy) as response:
+                status = response.status
                 logger.info(f"请求响应状态: {response.status}")
                 response.raise_for_status()
                 data = await response.json()
-                logger.debug(f"响应数据: {data}")
+                # 惰性格式化：未开启DEBUG时不会把整个响应转成字符串
+                logger.debug("响应数据: %s", data)
                 return data
         except aiohttp.ClientResponseError as e:
             logger.error(f"请求失败 {e.status}: {e.message}")
@@ -377,12 +1234,19 @@ class JavBusAPI:
         except aiohttp.ClientError as e:
             logger.error(f"网络请求失败: {str(e)}")
             raise
+        except asyncio.TimeoutError:
+            status = 'timeout'
+            logger.error(f"请求超时: {url}")
+            raise
         except ValueError as e:
             logger.error(f"JSON解析失败: {str(e)}")
             raise
         except Exception as e:
             logger.error(f"请求处理失败: {str(e)}")
             raise
+        finally:
+            self.metrics.inc('javbus_upstream_requests_total', endpoint=endpoint, status=status)
+            self.metrics.observe('javbus_upstream_seconds', time.perf_counter() - started, endpoint=endpoint)
 
     async def get_movies(
             self,
@@ -391,7 +1255,7 @@ class JavBusAPI:
             filter_type: Optional[str] = None,
             filter_value: Optional[str] = None,
             movie_type: str = "normal"
-    ) -> Dict[str, Any]:
+    ) -> MoviePage:
         params = {
             'page': page,
             'magnet': magnet,
@@ -404,8 +1268,9 @@ class JavBusAPI:
                 'filterValue': filter_value
             })
 
-        url = f"{self.base_url}/api/movies"
-        return await self._request(url, params)
+        data = await self._request("/api/movies", params, endpoint='movies', codec=MOVIE_PAGE)
+        await self._observe_stars(movies=data.movies)
+        return data
 
     async def search_movies(
             self,
@@ -413,7 +1278,7 @@ class JavBusAPI:
             page: int = 1,
             magnet: str = "exist",
             movie_type: str = "normal"
-    ) -> Dict[str, Any]:
+    ) -> MoviePage:
         params = {
             'keyword': keyword,
             'page': page,
@@ -421,12 +1286,93 @@ class JavBusAPI:
             'type': movie_type
         }
 
-        url = f"{self.base_url}/api/movies/search"
-        return await self._request(url, params)
+        data = await self._request("/api/movies/search", params, endpoint='search', codec=MOVIE_PAGE)
+        await self._observe_stars(movies=data.movies)
+        return data
+
+    async def _observe_stars(self, movies: Optional[List[Movie]] = None, star: Optional[StarInfo] = None) -> None:
+        """把看到的演员ID/名称收录进本地演员索引"""
+        if self.star_index is None:
+            return
+        if movies:
+            self.star_index.observe_movies(movies)
+        if star:
+            self.star_index.observe_star(star)
+        await self.star_index.maybe_save()
+
+    async def get_movie_detail(self, movie_id: str) -> Optional[MovieDetail]:
+        detail = await self._request(f"/api/movies/{movie_id}", endpoint='detail',
+                                     store_key=('movies', movie_id.upper()), codec=MOVIE_DETAIL)
+        self._remember_magnet_tokens(movie_id, detail)
+        if detail:
+            await self._observe_stars(movies=[detail])
+        return detail
+
+    def _remember_magnet_tokens(self, movie_id: str, detail: Optional[MovieDetail]) -> None:
+        """记录影片的gid/uc，供后续磁力请求直接使用"""
+        if detail is None or not detail.gid or not detail.uc:
+            return
+        key = movie_id.upper()
+        self._magnet_tokens[key] = (detail.gid, detail.uc)
+        self._magnet_tokens.move_to_end(key)
+        while len(self._magnet_tokens) > self._magnet_tokens_max:
+            self._magnet_tokens.popitem(last=False)
+
+    async def get_movie_with_magnets(
+            self,
+            movie_id: str,
+            sort_by: str = "size",
+            sort_order: str = "desc"
+    ) -> Tuple[Optional[MovieDetail], List[Magnet], Dict[str, float]]:
+        """获取影片详情及磁力链接
+
+        已知该番号的gid/uc时，详情与磁力请求并发发出；否则先取详情再取磁力。
+        磁力获取失败不影响详情返回。
+
+        Returns:
+            (详情, 磁力列表, 各阶段耗时秒数)
+        """
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        async def timed(stage: str, coro):
+            stage_start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[stage] = time.perf_counter() - stage_start
+
+        async def fetch_magnets(gid: str, uc: str) -> List[Magnet]:
+            try:
+                return await timed('magnets', self.get_magnets(movie_id, gid, uc, sort_by, sort_order)) or []
+            except BudgetExhausted:
+                raise
+            except Exception as e:
+                logger.error(f"磁力链接获取失败: {str(e)}", exc_info=True)
+                return []
+
+        tokens = self._magnet_tokens.get(movie_id.upper())
+        if tokens:
+            logger.info(f"已知磁力令牌，并发获取详情与磁力: {movie_id}")
+            detail, magnets = await asyncio.gather(
+                timed('detail', self.get_movie_detail(movie_id)),
+                fetch_magnets(*tokens)
+            )
+            new_tokens = self._magnet_tokens.get(movie_id.upper())
+            if detail and new_tokens and new_tokens != tokens:
+                logger.info(f"磁力令牌已变化，重新获取磁力: {movie_id}")
+                magnets = await fetch_magnets(*new_tokens)
+        else:
+            detail = await timed('detail', self.get_movie_detail(movie_id))
+            magnets = []
+            if detail and detail.gid and detail.uc:
+                logger.info(f"开始获取磁力链接: gid={detail.gid}, uc={detail.uc}")
+                magnets = await fetch_magnets(detail.gid, detail.uc)
+            elif detail:
+                logger.warning("缺少获取磁力链接的必要参数")
 
-    async def get_movie_detail(self, movie_id: str) -> Dict[str, Any]:
-        url = f"{self.base_url}/api/movies/{movie_id}"
-        return await self._request(url)
+        timings['total'] = time.perf_counter() - start
+        return detail, magnets, timings
 
     async def get_magnets(
             self,
@@ -435,7 +1381,7 @@ class JavBusAPI:
             uc: str,
             sort_by: str = "size",
             sort_order: str = "desc"
-    ) -> List[Dict]:
+    ) -> List[Magnet]:
         params = {
             'gid': gid,
             'uc': uc,
@@ -443,51 +1389,138 @@ class JavBusAPI:
             'sortOrder': sort_order
         }
 
-        url = f"{self.base_url}/api/magnets/{movie_id}"
-        return await self._request(url, params)
+        store_key = ('magnets', f"{movie_id.upper()}:{sort_by}:{sort_order}")
+        return await self._request(f"/api/magnets/{movie_id}", params, endpoint='magnets',
+                                   store_key=store_key, codec=MAGNETS)
 
     async def get_star_detail(
             self,
             star_id: str,
             star_type: str = "normal"
-    ) -> Dict[str, Any]:
+    ) -> Optional[StarInfo]:
         params = {'type': star_type}
-        url = f"{self.base_url}/api/stars/{star_id}"
-        return await self._request(url)
+        data = await self._request(f"/api/stars/{star_id}", endpoint='star',
+                                   store_key=('stars', star_id), codec=STAR)
+        await self._observe_stars(star=data)
+        return data
 
-    async def get_star_by_name(self, star_name: str) -> Optional[Dict[str, Any]]:
-        """通过演员名称搜索演员信息"""
+    @staticmethod
+    def _rank_star_candidates(star_name: str, movies: List[Movie]) -> List[str]:
+        """从影片列表中收集名称匹配的演员ID并排序
+
+        排序依据：完全匹配 > 前缀匹配 > 包含匹配，同级按出现次数降序，
+        再按首次出现顺序，保证结果稳定。
+        """
+        target = star_name.strip().lower()
+        candidates: Dict[str, List[int]] = {}
+        order = 0
+        for movie in movies:
+            for star in movie.stars:
+                if not star.id or not star.name:
+                    continue
+                name = star.name.strip().lower()
+                if target not in name:
+                    continue
+                if name == target:
+                    match = 3
+                elif name.startswith(target):
+                    match = 2
+                else:
+                    match = 1
+                entry = candidates.get(star.id)
+                if entry is None:
+                    candidates[star.id] = [match, 1, order]
+                    order += 1
+                else:
+                    entry[0] = max(entry[0], match)
+                    entry[1] += 1
+        return sorted(candidates, key=lambda sid: (-candidates[sid][0], -candidates[sid][1], candidates[sid][2]))
+
+    def _remember_star_id(self, star_name: str, star_id: str) -> None:
+        key = star_name.strip().lower()
+        self._star_name_ids[key] = star_id
+        self._star_name_ids.move_to_end(key)
+        while len(self._star_name_ids) > self._star_name_ids_max:
+            self._star_name_ids.popitem(last=False)
+
+    async def get_star_by_name(self, star_name: str) -> Optional[StarInfo]:
+        """通过演员名称搜索演员信息
+
+        并发拉取多页搜索结果，对名称匹配的演员按匹配程度和出现次数排序，
+        并发获取排名靠前的候选详情，返回排名最高的可用结果。
+        名称到演员ID的映射会被缓存。
+        """
         if not star_name:
             return None
-            
+
         try:
-            # 先搜索包含该演员的影片
-            movie_lists = await self.search_movies(star_name)
-            movies = movie_lists.get("movies", [])
-            
+            star_id = self._star_name_ids.get(star_name.strip().lower())
+            if star_id:
+                logger.info(f"演员名称缓存命中: {star_name} -> {star_id}")
+                return await self.get_star_detail(star_id)
+
+            # 本地存储中已有同名演员时直接返回
+            if self.store:
+                stored_stars = await self.store.find_stars_by_name(star_name)
+                star = StarInfo.from_row(stored_stars[0]) if stored_stars else None
+                if star is not None:
+                    logger.info(f"本地存储命中演员: {star_name}")
+                    self._remember_star_id(star_name, star.id)
+                    return star
+
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def bounded(coro):
+                async with semaphore:
+                    return await coro
+
+            # 并发搜索多页包含该演员的影片
+            pages = await asyncio.gather(
+                *(bounded(self.search_movies(star_name, page=page))
+                  for page in range(1, self.star_search_pages + 1)),
+                return_exceptions=True
+            )
+            if isinstance(pages[0], Exception):
+                raise pages[0]
+
+            movies = []
+            for page, result in enumerate(pages, 1):
+                if isinstance(result, Exception):
+                    logger.debug("演员搜索第 %d 页获取失败: %s", page, result)
+                    continue
+                movies.extend(result.movies)
+
             if not movies:
                 logger.info(f"未找到包含演员 {star_name} 的影片")
                 return None
 
-            # 从影片中提取演员信息
-            star_ids = set()
-            for movie in movies:
-                if not movie.get("stars"):
-                    continue
-                    
-                for star in movie["stars"]:
-                    if isinstance(star, dict) and "name" in star and "id" in star:
-                        if star_name in star["name"]:
-                            star_ids.add(star["id"])
-
+            # 从影片中提取并排序候选演员
+            star_ids = self._rank_star_candidates(star_name, movies)
             if not star_ids:
                 logger.info(f"未找到演员 {star_name} 的ID信息")
                 return None
+            logger.info(f"演员 {star_name} 的候选ID: {star_ids[:self.star_candidates]}")
 
-            # 获取第一个演员的详细信息
-            star_id = list(star_ids)[0]
-            return await self.get_star_detail(star_id)
-            
+            # 并发获取排名靠前的候选详情，按排名返回第一个成功的结果
+            candidates = star_ids[:self.star_candidates]
+            details = await asyncio.gather(
+                *(bounded(self.get_star_detail(sid)) for sid in candidates),
+                return_exceptions=True
+            )
+            if all(isinstance(detail, BudgetExhausted) for detail in details):
+                raise details[0]
+            for sid, detail in zip(candidates, details):
+                if isinstance(detail, Exception) or not detail:
+                    logger.debug("演员 %s 详情获取失败: %s", sid, detail)
+                    continue
+                self._remember_star_id(star_name, sid)
+                return detail
+
+            logger.info(f"演员 {star_name} 的候选详情均获取失败")
+            return None
+
+        except BudgetExhausted:
+            raise
         except Exception as e:
             logger.error(f"搜索演员 {star_name} 失败: {str(e)}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from astrbot.core import logger
+
+
+class Backend:
+    """单个JavBus API后端的运行状态"""
+
+    __slots__ = ("url", "ewma", "outstanding", "failures", "healthy", "down_until",
+                 "requests", "errors")
+
+    def __init__(self, url: str, initial_latency: float = 0.5):
+        self.url = url.rstrip('/')
+        self.ewma = initial_latency
+        self.outstanding = 0
+        self.failures = 0
+        self.healthy = True
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self) -> float:
+        """越小越优先：平均延迟 ×（进行中请求数 + 1）"""
+        return self.ewma * (self.outstanding + 1)
+
+
+class BackendPool:
+    """
+    多后端负载均衡
+
+    功能:
+    - 按 EWMA 延迟与进行中请求数选择后端
+    - 被动健康检查：连续失败达到阈值后摘除，冷却期后自动恢复
+    - 主动探测：后台定期探测已摘除的后端，成功则提前恢复
+    - 为故障转移提供按优先级排序的后端列表
+    """
+
+    def __init__(
+            self,
+            urls: List[str],
+            failure_threshold: int = 3,
+            cooldown: float = 30,
+            ewma_alpha: float = 0.3,
+            probe_interval: float = 15,
+            probe_path: str = "/api/movies"
+    ):
+        seen = []
+        for url in urls:
+            url = url.strip().rstrip('/')
+            if url and url not in seen:
+                seen.append(url)
+        self.backends = [Backend(url) for url in seen]
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.probe_interval = probe_interval
+        self.probe_path = probe_path
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def parse_urls(value) -> List[str]:
+        """解析配置中的后端地址，支持列表或逗号/换行分隔的字符串"""
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.replace('\n', ',').split(',')
+        return [str(url).strip() for url in value if str(url).strip()]
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def _available(self, backend: Backend, now: float) -> bool:
+        if backend.healthy:
+            return True
+        if now >= backend.down_until:
+            # 冷却期结束，放行试探
+            backend.healthy = True
+            backend.failures = 0
+            logger.info(f"后端冷却结束，重新启用: {backend.url}")
+            return True
+        return False
+
+    def ranked(self) -> List[Backend]:
+        """按优先级排序的后端，不可用的后端排在最后作为兜底"""
+        now = time.monotonic()
+        return sorted(self.backends, key=lambda b: (not self._available(b, now), b.score()))
+
+    def select(self) -> Optional[Backend]:
+        ranked = self.ranked()
+        return ranked[0] if ranked else None
+
+    def begin(self, backend: Backend) -> float:
+        backend.outstanding += 1
+        backend.requests += 1
+        return time.perf_counter()
+
+    def end(self, backend: Backend, started: float, ok: Optional[bool]) -> None:
+        """记录一次请求结果
+
+        ok为True表示成功，False表示后端故障（网络错误、超时、5xx），
+        None表示请求被取消，只释放计数不更新统计。
+        """
+        backend.outstanding = max(0, backend.outstanding - 1)
+        if ok is None:
+            return
+        if ok:
+            latency = time.perf_counter() - started
+            backend.ewma = self.ewma_alpha * latency + (1 - self.ewma_alpha) * backend.ewma
+            backend.failures = 0
+            return
+        backend.errors += 1
+        backend.failures += 1
+        # 失败时加大延迟估计，使故障后端在摘除前也逐渐降低优先级
+        backend.ewma = min(backend.ewma * 2, 30.0)
+        if backend.healthy and backend.failures >= self.failure_threshold:
+            backend.healthy = False
+            backend.down_until = time.monotonic() + self.cooldown
+            logger.warning(f"后端连续失败 {backend.failures} 次，暂时摘除 {self.cooldown} 秒: {backend.url}")
+
+    def start_probes(self, probe: Callable[[str], Awaitable[bool]]) -> None:
+        """启动后台主动探测，需在运行中的事件循环内调用"""
+        if self.probe_interval <= 0 or len(self.backends) < 2:
+            return
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop(probe))
+
+    async def _probe_loop(self, probe: Callable[[str], Awaitable[bool]]) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            for backend in self.backends:
+                if backend.healthy:
+                    continue
+                try:
+                    ok = await probe(backend.url + self.probe_path)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    ok = False
+                if ok:
+                    backend.healthy = True
+                    backend.failures = 0
+                    logger.info(f"后端探测成功，恢复: {backend.url}")
+
+    async def stop_probes(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        return {
+            b.url: {
+                'healthy': b.healthy,
+                'ewma_ms': round(b.ewma * 1000, 1),
+                'outstanding': b.outstanding,
+                'requests': b.requests,
+                'errors': b.errors,
+            }
+            for b in self.backends
+        }
@@ -0,0 +1,132 @@
+import random
+import time
+from typing import Dict, Optional
+from astrbot.core import logger
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    状态:
+    - closed: 正常放行
+    - open: 连续失败达到阈值后熔断，recovery_timeout 内直接拒绝
+    - half_open: 熔断超时后放行一次试探请求，成功则关闭，失败则重新熔断
+
+    allow() 放行时返回一个凭证，拒绝时返回None。调用方须在 finally 中以该凭证调用 release()：
+    试探请求没有记录成功或失败（如非熔断类错误码、未知异常、任务取消）时释放试探名额，
+    避免半开状态永久拒绝请求；只有试探请求自己的凭证才能释放名额。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    # 导出为仪表时以下标表示状态
+    STATES = (CLOSED, HALF_OPEN, OPEN)
+    # 非试探请求共用的放行凭证
+    PASS = object()
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe: Optional[object] = None
+
+        self.successes = 0
+        self.failures = 0
+        self.short_circuits = 0
+        self.opens = 0
+
+    def allow(self) -> Optional[object]:
+        """当前是否允许发出请求：放行时返回凭证，半开状态下的试探请求得到专属凭证；拒绝时返回None"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.recovery_timeout:
+                self.short_circuits += 1
+                return None
+            self.state = self.HALF_OPEN
+            self._probe = None
+            logger.info(f"熔断器 {self.name} 进入半开状态")
+        if self.state == self.HALF_OPEN:
+            if self._probe is not None:
+                self.short_circuits += 1
+                return None
+            self._probe = object()
+            return self._probe
+        return self.PASS
+
+    def record_success(self) -> None:
+        self.successes += 1
+        self._failures = 0
+        if self.state != self.CLOSED:
+            logger.info(f"熔断器 {self.name} 已恢复")
+        self.state = self.CLOSED
+        self._probe = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opens += 1
+                logger.warning(f"熔断器 {self.name} 已熔断，{self.recovery_timeout}秒内请求将被拒绝")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe = None
+
+    def release(self, ticket: Optional[object]) -> None:
+        """释放未记录结果的试探名额；不是当前试探请求的凭证或已记录结果时无操作"""
+        if ticket is not None and ticket is self._probe:
+            self._probe = None
+
+    def retry_after(self) -> float:
+        """熔断状态下距离可试探的剩余秒数"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'state': self.state,
+            'successes': self.successes,
+            'failures': self.failures,
+            'short_circuits': self.short_circuits,
+            'opens': self.opens,
+        }
+
+
+class RetryPolicy:
+    """带上限和抖动的指数退避重试策略"""
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            base_delay: float = 1.0,
+            max_delay: float = 10.0,
+            deadline: float = 15.0
+    ):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次失败后的等待时间（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, failure_threshold: int = 3, recovery_timeout: float = 60) -> CircuitBreaker:
+    """获取进程内共享的熔断器，同名翻译服务共用同一个熔断状态"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, recovery_timeout)
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, object]]:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
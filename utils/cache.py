@@ -0,0 +1,206 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from astrbot.core import logger
+
+
+class CacheEntry:
+    """缓存条目"""
+
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class BaseCache(ABC):
+    """
+    响应缓存接口
+
+    JavBusAPI 只依赖 get / set / get_or_fetch / stats 四个方法，
+    需要替换存储实现（如 Redis）时继承本类即可。
+    """
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        """由接口路径和规范化后的参数生成缓存键"""
+        if not params:
+            return endpoint
+        normalized = "&".join(
+            f"{k}={str(v).strip().lower()}"
+            for k, v in sorted(params.items())
+            if v is not None
+        )
+        return f"{endpoint}?{normalized}"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """返回 (值, 是否新鲜)，未命中返回 None"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, endpoint: Optional[str] = None) -> None:
+        """写入缓存，endpoint 决定TTL"""
+
+    @abstractmethod
+    async def get_or_fetch(
+            self,
+            key: str,
+            endpoint: Optional[str],
+            fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """命中时返回缓存值，否则调用 fetch 获取并写入缓存"""
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+    async def close(self) -> None:
+        """释放缓存持有的资源，插件卸载时调用"""
+
+
+class ResponseCache(BaseCache):
+    """
+    内存 TTL + LRU 响应缓存
+
+    功能:
+    - 按接口类型设置不同的TTL（详情长、搜索短、磁力居中）
+    - 条目数上限，超出后淘汰最久未使用的条目
+    - stale-while-revalidate：过期但仍在宽限期内的条目直接返回，
+      同时在后台发起一次刷新
+    - 命中/未命中/淘汰计数
+    """
+
+    DEFAULT_TTLS = {
+        'detail': 24 * 3600,
+        'magnets': 3600,
+        'search': 600,
+        'movies': 600,
+        'star': 24 * 3600,
+    }
+
+    def __init__(
+            self,
+            max_entries: int = 1024,
+            ttls: Optional[Dict[str, float]] = None,
+            default_ttl: float = 300,
+            stale_ttl: float = 600
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def _ttl_for(self, endpoint: Optional[str]) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    async def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now >= entry.stale_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry.value, now < entry.expires_at
+
+    async def set(self, key: str, value: Any, endpoint: Optional[str] = None) -> None:
+        ttl = self._ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(value, now + ttl, now + ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(
+            self,
+            key: str,
+            endpoint: Optional[str],
+            fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        cached = await self.get(key)
+        if cached is not None:
+            value, fresh = cached
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._schedule_refresh(key, endpoint, fetch)
+            return value
+
+        self.misses += 1
+        value = await fetch()
+        await self.set(key, value, endpoint)
+        return value
+
+    def _schedule_refresh(
+            self,
+            key: str,
+            endpoint: Optional[str],
+            fetch: Callable[[], Awaitable[Any]]
+    ) -> None:
+        """为过期条目安排一次后台刷新，同一键同时只刷新一次"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, endpoint, fetch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(
+            self,
+            key: str,
+            endpoint: Optional[str],
+            fetch: Callable[[], Awaitable[Any]]
+    ) -> None:
+        try:
+            value = await fetch()
+            await self.set(key, value, endpoint)
+            self.refreshes += 1
+            logger.debug("缓存后台刷新完成: %s", key)
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning(f"缓存后台刷新失败 {key}: {str(e)}")
+        finally:
+            self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def close(self) -> None:
+        """取消尚未完成的后台刷新"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+        }
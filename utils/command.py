@@ -0,0 +1,188 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+
+_MOVIE_ID_RE = re.compile(r"(?:(fc2)[-_ ]?(?:ppv)?|([a-z]+))[-_ ]?(\d+)", re.IGNORECASE)
+
+
+def normalize_movie_id(text: str) -> str:
+    """规范化番号：abc123 / abc_123 / ABC 123 -> ABC-123，FC2PPV123 -> FC2-PPV-123"""
+    text = text.strip()
+    match = _MOVIE_ID_RE.fullmatch(text)
+    if match is None:
+        return text.upper()
+    fc2, label, number = match.groups()
+    if fc2:
+        return f"FC2-PPV-{number}"
+    return f"{label.upper()}-{number}"
+
+
+_ID_SEPARATOR_RE = re.compile(r"[\s,，;；、]+")
+_ID_CHARS_RE = re.compile(r"[a-zA-Z0-9_-]+")
+_DASHED_ID_RE = re.compile(r"([A-Z]+)-(\d+)")
+
+
+def compact_movie_id(movie_id: str) -> Optional[str]:
+    """规范化番号去掉连字符的形式（N-1234 -> N1234），用于东京热等本身不带连字符的番号；不适用时返回None"""
+    match = _DASHED_ID_RE.fullmatch(movie_id)
+    return f"{match.group(1)}{match.group(2)}" if match else None
+
+
+def split_movie_ids(text: str) -> List[str]:
+    """把一条消息中的多个番号拆开并规范化，去重且保持顺序
+
+    支持空白、逗号、分号、顿号分隔；“ABC 123”这类被空格隔开的字母和数字合并为一个番号。
+    遇到第一段不是番号字符的文字即停止，番号后附带的说明（如“ABC-123 高清”）被忽略。
+    """
+    tokens = []
+    for token in _ID_SEPARATOR_RE.split(text):
+        if not token:
+            continue
+        if not _ID_CHARS_RE.fullmatch(token):
+            break
+        tokens.append(token)
+    ids: List[str] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token[-1].isalpha() and i + 1 < len(tokens) and tokens[i + 1].isdigit():
+            token = f"{token}-{tokens[i + 1]}"
+            i += 1
+        i += 1
+        movie_id = normalize_movie_id(token)
+        if movie_id not in ids:
+            ids.append(movie_id)
+    return ids
+
+
+def _case_variants(text: str) -> List[str]:
+    """text 中每个字符取大小写形式的所有组合"""
+    variants = ['']
+    for char in text:
+        forms = {char, char.lower(), char.upper()}
+        variants = [v + form for v in variants for form in forms if len(form) == 1]
+    return variants
+
+
+class ParsedCommand(NamedTuple):
+    name: str
+    arg: str
+
+
+class CommandRouter:
+    """
+    命令路由
+
+    每条消息只解析一次纯文本，按首字符查表后做前缀匹配（长前缀优先），
+    支持别名和 # / 前缀形式。参数可用预编译正则校验，校验失败视为非命令。
+
+    使用示例:
+    router = CommandRouter()
+    router.add("搜磁力", aliases=["磁力"], arg_pattern=r"[a-zA-Z0-9-]+")
+    router.parse("#搜磁力abc123")  # ParsedCommand(name="搜磁力", arg="abc123")
+    """
+
+    COMMAND_PREFIXES = ('#', '/')
+
+    def __init__(self):
+        # 前缀开头 head_len 个字符的各种大小写形式 -> [(前缀, 是否含大小写字母, 命令名, 参数正则, 是否需要参数)]，
+        # 按前缀长度降序；非命令消息只需一次切片和一次字典查找
+        self._table: Dict[str, List[Tuple[str, bool, str, Optional[Pattern], Optional[bool]]]] = {}
+        self._entries: List[Tuple[str, bool, str, Optional[Pattern], Optional[bool]]] = []
+        self._head_len = 2
+        self._names: List[str] = []
+
+    def add(
+            self,
+            name: str,
+            aliases: Iterable[str] = (),
+            arg_pattern: Optional[str] = None,
+            arg_required: Optional[bool] = None
+    ) -> None:
+        """注册命令
+
+        Args:
+            name: 命令名，同时也是主前缀
+            aliases: 其它触发前缀
+            arg_pattern: 参数需完整匹配的正则
+            arg_required: True 要求有参数，False 要求无参数，None 不限制
+        """
+        pattern = re.compile(arg_pattern) if arg_pattern else None
+        self._names.append(name)
+        for prefix in (name, *aliases):
+            folded = prefix.casefold()
+            self._entries.append((folded, folded != prefix.upper(), name, pattern, arg_required))
+            self._head_len = min(self._head_len, len(folded))
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        table: Dict[str, List[Tuple[str, bool, str, Optional[Pattern], Optional[bool]]]] = {}
+        for entry in sorted(self._entries, key=lambda item: -len(item[0])):
+            for head in _case_variants(entry[0][:self._head_len]):
+                table.setdefault(head, []).append(entry)
+        self._table = table
+
+    def parse(self, text: str) -> Optional[ParsedCommand]:
+        """解析消息文本，不是已注册命令时返回None"""
+        # 绝大多数消息不是命令，开头查表未命中时直接返回
+        bucket = self._table.get(text[:self._head_len])
+        if bucket is None:
+            head = text[:1]
+            if not head or not (head in self.COMMAND_PREFIXES or head.isspace()):
+                return None
+            text = (text[1:] if head in self.COMMAND_PREFIXES else text).lstrip()
+            bucket = self._table.get(text[:self._head_len])
+            if bucket is None:
+                return None
+        for prefix, cased, name, pattern, required in bucket:
+            # 中文前缀没有大小写，只做一次startswith；含字母的前缀才折叠大小写比较
+            if not (text.startswith(prefix) or (cased and text[:len(prefix)].casefold() == prefix)):
+                continue
+            arg = text[len(prefix):].strip()
+            if arg:
+                if required is False or (pattern is not None and pattern.fullmatch(arg) is None):
+                    return None
+            elif required:
+                return None
+            return ParsedCommand(name, arg)
+        return None
+
+    def commands(self) -> List[str]:
+        return list(self._names)
+
+
+# 插件注册的命令：(命令名, 别名, 参数正则, 是否需要参数)
+COMMAND_ROUTES: Tuple[Tuple[str, Tuple[str, ...], Optional[str], Optional[bool]], ...] = (
+    ("搜关键词", ("搜番号",), None, None),
+    ("搜演员", ("搜女优",), None, None),
+    # 支持一次查询多个番号，以空白、逗号、分号或顿号分隔
+    # 以番号开头，之后可以是更多番号或附带文字，附带文字在拆分番号时忽略
+    ("搜磁力", ("磁力",), r"[a-zA-Z0-9_-]+(?:[\s,，;；、][\s\S]*)?", True),
+    ("下一页", ("下页",), None, False),
+    ("javbus状态", ("javbus指标",), None, None),
+    ("订阅", (), None, True),
+    ("取消订阅", ("退订",), None, True),
+    ("订阅列表", ("我的订阅",), None, False),
+    ("磁力偏好", (), None, None),
+)
+
+
+def build_router() -> CommandRouter:
+    """按 COMMAND_ROUTES 注册所有命令及别名"""
+    router = CommandRouter()
+    for name, aliases, arg_pattern, arg_required in COMMAND_ROUTES:
+        router.add(name, aliases=aliases, arg_pattern=arg_pattern, arg_required=arg_required)
+    return router
+
+
+def message_text(event) -> str:
+    """取消息的纯文本：优先使用事件自带的 message_str，否则拼接消息链中的文本段"""
+    text = getattr(event, 'message_str', None)
+    if text:
+        return text
+    parts = []
+    for component in event.get_messages():
+        part = getattr(component, 'text', None)
+        if part:
+            parts.append(part)
+    return ''.join(parts)
@@ -0,0 +1,34 @@
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """
+    原子写入文件
+
+    先写入同目录下唯一命名的临时文件，再用 os.replace 覆盖目标文件。
+    多个线程同时保存同一文件时各自使用独立的临时文件，读者只会看到某一次完整的写入。
+    临时文件以 .tmp 结尾，写入失败时删除。
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(
+        'wb', dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp', delete=False
+    )
+    try:
+        with f:
+            f.write(data)
+        os.replace(f.name, path)
+    except BaseException:
+        try:
+            os.unlink(f.name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: Any, ensure_ascii: bool = False) -> None:
+    """将data序列化为JSON后原子写入path"""
+    atomic_write_bytes(path, json.dumps(data, ensure_ascii=ensure_ascii).encode('utf-8'))
@@ -0,0 +1,87 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+
+class HedgePolicy:
+    """
+    对冲请求策略
+
+    首次请求超过该接口近期延迟的指定分位数仍未返回时，再发出一次对冲请求，
+    取先完成的结果。对冲请求数不超过总请求数的 budget 比例。
+    """
+
+    def __init__(
+            self,
+            endpoints: Iterable[str] = ('detail', 'magnets'),
+            percentile: float = 0.95,
+            min_delay: float = 0.2,
+            max_delay: float = 5.0,
+            budget: float = 0.1,
+            window: int = 200,
+            min_samples: int = 20
+    ):
+        self.endpoints = set(endpoints)
+        self.percentile = min(max(percentile, 0.0), 1.0)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional["HedgePolicy"]:
+        if not config.get("hedge_enabled", False):
+            return None
+        return cls(
+            percentile=config.get("hedge_percentile", 0.95),
+            min_delay=config.get("hedge_min_delay", 0.2),
+            budget=config.get("hedge_budget", 0.1),
+        )
+
+    def applies(self, endpoint: Optional[str]) -> bool:
+        return endpoint in self.endpoints
+
+    def record(self, endpoint: Optional[str], latency: float) -> None:
+        """记录一次成功请求的延迟"""
+        if endpoint is None:
+            return
+        samples = self._latencies.get(endpoint)
+        if samples is None:
+            samples = self._latencies[endpoint] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def delay(self, endpoint: Optional[str]) -> float:
+        """对冲前的等待时间：样本不足时使用max_delay，避免冷启动时过度对冲"""
+        samples = self._latencies.get(endpoint)
+        if not samples or len(samples) < self.min_samples:
+            return self.max_delay
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def start(self) -> None:
+        """记录一次首发请求"""
+        self.requests += 1
+
+    def try_spend(self) -> bool:
+        """对冲额度是否充足，充足时扣除一次"""
+        if self.hedges + 1 > self.budget * self.requests:
+            self.budget_denied += 1
+            return False
+        self.hedges += 1
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'budget_denied': self.budget_denied,
+            'delays_ms': {ep: round(self.delay(ep) * 1000, 1) for ep in self._latencies},
+        }
@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+from typing import Dict, List, Optional
+import aiohttp
+from astrbot.core import logger
+from .fileio import atomic_write_bytes, atomic_write_json
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # Pillow 为可选依赖，未安装时不做压缩
+    PILImage = None
+
+
+class ImageCache:
+    """
+    图片预取与本地缩略图缓存
+
+    功能:
+    - 并发预取封面/头像，发送本地文件，避免聊天平台每次重新下载原图
+    - 文件按内容哈希命名，相同图片只存一份；URL -> 文件 的索引持久化
+    - 总大小超过上限时按最近访问时间淘汰
+    - 安装了Pillow时按最大边长和质量重新编码为JPEG
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+            self,
+            cache_dir: str,
+            max_bytes: int = 200 * 1024 * 1024,
+            max_dimension: int = 800,
+            quality: int = 80,
+            concurrency: int = 4,
+            timeout: float = 15,
+            headers: Optional[Dict[str, str]] = None
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.timeout = timeout
+        self.headers = headers or {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Referer': 'https://www.javbus.com/'
+        }
+        self._semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._index: Dict[str, str] = {}
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+        if PILImage is None:
+            logger.info("未安装Pillow，图片缓存不做压缩")
+
+    def _load(self) -> None:
+        for name in os.listdir(self.cache_dir):
+            if name == self.INDEX_FILE or name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isfile(path):
+                self._sizes[name] = os.path.getsize(path)
+        self._total_bytes = sum(self._sizes.values())
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self._index = {k: v for k, v in json.load(f).items() if v in self._sizes}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"图片缓存索引加载失败: {str(e)}")
+        logger.info(f"图片缓存已加载，{len(self._sizes)} 个文件，{self._total_bytes / 1024 / 1024:.1f}MB")
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    def _lookup(self, url: str) -> Optional[str]:
+        name = self._index.get(self._url_key(url))
+        if name is None or name not in self._sizes:
+            return None
+        path = os.path.join(self.cache_dir, name)
+        try:
+            os.utime(path)
+        except OSError:
+            self._forget(name)
+            return None
+        return path
+
+    def _reencode(self, data: bytes) -> bytes:
+        """缩放并重新编码为JPEG，失败时返回原始数据"""
+        if PILImage is None or self.max_dimension <= 0:
+            return data
+        try:
+            with PILImage.open(io.BytesIO(data)) as img:
+                img = img.convert('RGB')
+                img.thumbnail((self.max_dimension, self.max_dimension))
+                out = io.BytesIO()
+                img.save(out, format='JPEG', quality=self.quality, optimize=True)
+                encoded = out.getvalue()
+            return encoded if len(encoded) < len(data) else data
+        except Exception as e:
+            logger.debug("图片重新编码失败，保留原图: %s", e)
+            return data
+
+    def _store(self, data: bytes, url: str) -> str:
+        """写入按内容哈希命名的文件，返回文件名（在线程池中执行）"""
+        data = self._reencode(data)
+        ext = '.jpg' if data[:3] == b'\xff\xd8\xff' else os.path.splitext(url.split('?')[0])[1][:5] or '.img'
+        name = hashlib.sha256(data).hexdigest()[:32] + ext
+        path = os.path.join(self.cache_dir, name)
+        if not os.path.exists(path):
+            atomic_write_bytes(path, data)
+        return name
+
+    async def _download(self, url: str) -> Optional[str]:
+        async with self._semaphore:
+            session = await self._get_session()
+            try:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    data = await response.read()
+                name = await asyncio.to_thread(self._store, data, url)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                self.errors += 1
+                logger.warning(f"图片下载失败，使用原始URL: {url} ({str(e)})")
+                return None
+
+        if name not in self._sizes:
+            self._sizes[name] = os.path.getsize(os.path.join(self.cache_dir, name))
+            self._total_bytes += self._sizes[name]
+        self._index[self._url_key(url)] = name
+        self._dirty = True
+        await self._evict()
+        return os.path.join(self.cache_dir, name)
+
+    def _forget(self, name: str) -> None:
+        self._total_bytes -= self._sizes.pop(name, 0)
+
+    async def _evict(self) -> None:
+        """超过容量时按最近访问时间淘汰，淘汰到上限的90%"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+
+        def remove_oldest():
+            files = []
+            for name in list(self._sizes):
+                try:
+                    files.append((os.path.getmtime(os.path.join(self.cache_dir, name)), name))
+                except OSError:
+                    files.append((0, name))
+            removed = []
+            total = self._total_bytes
+            for _, name in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+                total -= self._sizes.get(name, 0)
+                removed.append(name)
+            return removed
+
+        removed = await asyncio.to_thread(remove_oldest)
+        for name in removed:
+            self._forget(name)
+        self.evictions += len(removed)
+        removed_set = set(removed)
+        self._index = {k: v for k, v in self._index.items() if v not in removed_set}
+        logger.info(f"图片缓存淘汰 {len(removed)} 个文件，当前 {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    async def get(self, url: str) -> str:
+        """返回图片的本地路径，下载失败时返回原始URL"""
+        if not url or not url.startswith(('http://', 'https://')):
+            return url
+        path = self._lookup(url)
+        if path:
+            self.hits += 1
+            return path
+        self.misses += 1
+
+        # 同一URL并发请求只下载一次
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url))
+            self._pending[url] = task
+            task.add_done_callback(lambda _t, u=url: self._pending.pop(u, None))
+        return await asyncio.shield(task) or url
+
+    async def fetch_many(self, urls: List[str]) -> List[str]:
+        """并发预取多张图片，返回与urls一一对应的本地路径或原始URL"""
+        results = await asyncio.gather(*(self.get(url) for url in urls))
+        await self.save_index()
+        return list(results)
+
+    async def save_index(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        index = dict(self._index)
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+
+        try:
+            await asyncio.to_thread(atomic_write_json, index_path, index, True)
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"图片缓存索引保存失败: {str(e)}")
+
+    async def close(self) -> None:
+        await self.save_index()
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'files': len(self._sizes),
+            'bytes': self._total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,181 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# 默认直方图分桶（秒），覆盖命令解析、本地缓存命中到上游慢请求
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'javbus_commands_total': '收到的命令数',
+    'javbus_command_seconds': '命令处理总耗时',
+    'javbus_stage_seconds': '各处理阶段耗时（parse/translate/upstream/image/reply）',
+    'javbus_upstream_requests_total': '上游API请求数，按接口和状态码',
+    'javbus_upstream_seconds': '上游API单次请求耗时',
+    'javbus_cache': '响应缓存计数',
+    'javbus_translate_cache': '翻译缓存计数',
+    'javbus_backend_healthy': '后端是否可用',
+    'javbus_backend_ewma_seconds': '后端EWMA延迟',
+    'javbus_admission': '限流计数（命令放行/拒绝、上游请求/排队/超预算）',
+    'javbus_breaker_state': '翻译服务熔断器状态（0=closed 1=half_open 2=open）',
+    'javbus_breaker': '翻译服务熔断器计数',
+    'javbus_hedge': '对冲请求计数',
+    'javbus_hedge_delay_seconds': '各接口当前的对冲触发延迟',
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_started")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: LabelKey):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._metrics._observe(self._name, self._labels, time.perf_counter() - self._started)
+
+
+class Metrics:
+    """
+    轻量指标注册表
+
+    支持计数器、仪表和直方图，热路径上只做字典查找和整数累加；
+    render() 按 Prometheus 文本格式导出，供管理员命令查看或外部采集。
+
+    使用示例:
+    metrics = get_metrics()
+    metrics.inc('javbus_commands_total', command='搜磁力')
+    with metrics.timer('javbus_stage_seconds', stage='translate'):
+        ...
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, object]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        series = self._counters.get(name)
+        if series is None:
+            series = self._counters[name] = {}
+        key = self._key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """设置仪表值，用于导出缓存大小、后端状态等快照"""
+        self._gauges.setdefault(name, {})[self._key(labels)] = value
+
+    def counter(self, name: str) -> Dict[LabelKey, float]:
+        return dict(self._counters.get(name, {}))
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        self._observe(name, self._key(labels), value)
+
+    def _observe(self, name: str, key: LabelKey, value: float) -> None:
+        series = self._histograms.get(name)
+        if series is None:
+            series = self._histograms[name] = {}
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        """计时上下文管理器，退出时把耗时记入直方图（异常退出同样记录）"""
+        return _Timer(self, name, self._key(labels))
+
+    def quantile(self, name: str, q: float, **labels) -> Optional[float]:
+        """按分桶估算分位数（取所在桶的上界），无样本时返回None"""
+        histogram = self._histograms.get(name, {}).get(self._key(labels))
+        if histogram is None or histogram.count == 0:
+            return None
+        target = q * histogram.count
+        seen = 0
+        for bound, count in zip(self.buckets, histogram.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+    @staticmethod
+    def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(key) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if value == float('inf'):
+            return '+Inf'
+        return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+    def render(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        lines: List[str] = []
+        for kind, families in (('counter', self._counters), ('gauge', self._gauges)):
+            for name in sorted(families):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(families[name].items()):
+                    lines.append(f"{name}{self._format_labels(key)} {self._format_value(value)}")
+        for name in sorted(self._histograms):
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(self._histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    labels = self._format_labels(key, ('le', self._format_value(bound)))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(key)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{self._format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """获取进程内共享的指标注册表"""
+    return _metrics
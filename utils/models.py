@@ -0,0 +1,305 @@
+import base64
+import json
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库json
+    orjson = None
+
+
+def dumps(payload: Any) -> str:
+    """紧凑序列化，安装了orjson时使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(payload).decode('utf-8')
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(data: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _text(value: Any, default: str = "") -> str:
+    if value is None:
+        return default
+    if isinstance(value, dict):
+        return str(value.get('name') or default)
+    return str(value)
+
+
+class StarRef(NamedTuple):
+    """影片中出现的演员，只保留ID和名称"""
+    id: str
+    name: str
+
+
+def _star_refs(items: Any) -> Tuple[StarRef, ...]:
+    refs = []
+    for item in items or ():
+        if isinstance(item, dict):
+            if item.get('id') or item.get('name'):
+                refs.append(StarRef(str(item.get('id') or ''), str(item.get('name') or '')))
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            refs.append(StarRef(str(item[0]), str(item[1])))
+        elif item:
+            refs.append(StarRef('', str(item)))
+    return tuple(refs)
+
+
+class Movie:
+    """搜索/列表结果中的一部影片，只解析回复中用到的字段
+
+    rendered 缓存按模板渲染好的回复文本，模型随响应缓存刷新而重建，缓存随之失效。
+    """
+
+    __slots__ = ("id", "title", "img", "date", "tags", "stars", "rendered")
+
+    def __init__(self, id: str, title: str = "", img: str = "", date: str = "",
+                 tags: Tuple[str, ...] = (), stars: Tuple[StarRef, ...] = ()):
+        self.id = id
+        self.title = title
+        self.img = img
+        self.date = date
+        self.tags = tags
+        self.stars = stars
+        self.rendered: Optional[Dict[Any, str]] = None
+
+    @classmethod
+    def from_api(cls, raw: Dict[str, Any]) -> "Movie":
+        return cls(
+            str(raw.get('id') or ''),
+            _text(raw.get('title')),
+            _text(raw.get('img')),
+            _text(raw.get('date')),
+            tuple(_text(tag) for tag in raw.get('tags') or ()),
+            _star_refs(raw.get('stars')),
+        )
+
+    def to_row(self) -> List[Any]:
+        return [self.id, self.title, self.img, self.date, list(self.tags), [list(s) for s in self.stars]]
+
+    @classmethod
+    def from_row(cls, row: Any) -> "Movie":
+        if isinstance(row, dict):
+            return cls.from_api(row)
+        movie_id, title, img, date, tags, stars = row[:6]
+        return cls(movie_id, title, img, date, tuple(tags), _star_refs(stars))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.id!r}, {self.title!r})"
+
+
+class MovieDetail(Movie):
+    """影片详情"""
+
+    __slots__ = ("video_length", "director", "gid", "uc")
+
+    def __init__(self, id: str, title: str = "", img: str = "", date: str = "",
+                 tags: Tuple[str, ...] = (), stars: Tuple[StarRef, ...] = (),
+                 video_length: Optional[int] = None, director: str = "", gid: str = "", uc: str = ""):
+        super().__init__(id, title, img, date, tags, stars)
+        self.video_length = video_length
+        self.director = director
+        self.gid = gid
+        self.uc = uc
+
+    @classmethod
+    def from_api(cls, raw: Any) -> Optional["MovieDetail"]:
+        if not isinstance(raw, dict) or not raw.get('id'):
+            return None
+        length = raw.get('videoLength')
+        return cls(
+            str(raw['id']),
+            _text(raw.get('title')),
+            _text(raw.get('img')),
+            _text(raw.get('date')),
+            (),
+            _star_refs(raw.get('stars')),
+            length if isinstance(length, int) else None,
+            _text(raw.get('director')),
+            _text(raw.get('gid')),
+            _text(raw.get('uc')),
+        )
+
+    def to_row(self) -> List[Any]:
+        return super().to_row() + [self.video_length, self.director, self.gid, self.uc]
+
+    @classmethod
+    def from_row(cls, row: Any) -> Optional["MovieDetail"]:
+        if isinstance(row, dict):
+            return cls.from_api(row)
+        movie_id, title, img, date, tags, stars, video_length, director, gid, uc = row[:10]
+        return cls(movie_id, title, img, date, tuple(tags), _star_refs(stars), video_length, director, gid, uc)
+
+
+_SIZE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?", re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+_BTIH_RE = re.compile(r"urn:btih:([0-9a-z]+)", re.IGNORECASE)
+
+
+def parse_size(text: str) -> int:
+    """把“1.2GB”“700MB”之类的体积文本解析为字节数，无法解析返回0"""
+    match = _SIZE_RE.search(text or "")
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_infohash(link: str) -> str:
+    """提取磁力链接的infohash，统一为小写十六进制；base32形式会被转换，无法提取时返回原链接"""
+    match = _BTIH_RE.search(link or "")
+    if not match:
+        return link
+    value = match.group(1)
+    if len(value) == 32:
+        try:
+            return base64.b32decode(value.upper()).hex()
+        except ValueError:
+            pass
+    return value.lower()
+
+
+class Magnet:
+    """磁力链接；size_bytes 和 infohash 在构建时解析一次，供排序和去重使用"""
+
+    __slots__ = ("link", "title", "size", "share_date", "is_hd", "has_subtitle", "size_bytes", "infohash", "rendered")
+
+    def __init__(self, link: str, title: str = "", size: str = "", share_date: str = "",
+                 is_hd: bool = False, has_subtitle: bool = False, size_bytes: Optional[int] = None):
+        self.link = link
+        self.title = title
+        self.size = size
+        self.share_date = share_date
+        self.is_hd = is_hd
+        self.has_subtitle = has_subtitle
+        self.size_bytes = size_bytes if size_bytes is not None else parse_size(size)
+        self.infohash = parse_infohash(link)
+        self.rendered: Optional[Dict[Any, str]] = None
+
+    @classmethod
+    def from_api(cls, raw: Dict[str, Any]) -> "Magnet":
+        number_size = raw.get('numberSize')
+        return cls(
+            _text(raw.get('link')),
+            _text(raw.get('title')),
+            _text(raw.get('size')),
+            _text(raw.get('shareDate')),
+            bool(raw.get('isHD')),
+            bool(raw.get('hasSubtitle')),
+            number_size if isinstance(number_size, int) else None,
+        )
+
+    def to_row(self) -> List[Any]:
+        return [self.link, self.title, self.size, self.share_date, int(self.is_hd), int(self.has_subtitle),
+                self.size_bytes]
+
+    @classmethod
+    def from_row(cls, row: Any) -> "Magnet":
+        if isinstance(row, dict):
+            return cls.from_api(row)
+        link, title, size, share_date, is_hd, has_subtitle = row[:6]
+        return cls(link, title, size, share_date, bool(is_hd), bool(has_subtitle), row[6] if len(row) > 6 else None)
+
+    def __repr__(self) -> str:
+        return f"Magnet({self.title!r}, {self.size!r})"
+
+
+class StarInfo:
+    """演员详情"""
+
+    __slots__ = ("id", "name", "avatar", "birthday", "age", "height", "bust", "waistline", "hipline", "rendered")
+    FIELDS = __slots__[:-1]
+
+    def __init__(self, id: str, name: str = "", avatar: str = "", birthday: str = "", age: str = "",
+                 height: str = "", bust: str = "", waistline: str = "", hipline: str = ""):
+        self.id = id
+        self.name = name
+        self.avatar = avatar
+        self.birthday = birthday
+        self.age = age
+        self.height = height
+        self.bust = bust
+        self.waistline = waistline
+        self.hipline = hipline
+        self.rendered: Optional[Dict[Any, str]] = None
+
+    @classmethod
+    def from_api(cls, raw: Any) -> Optional["StarInfo"]:
+        if not isinstance(raw, dict) or not raw.get('id'):
+            return None
+        return cls(*(_text(raw.get(field)) for field in cls.FIELDS))
+
+    def to_row(self) -> List[str]:
+        return [getattr(self, field) for field in self.FIELDS]
+
+    @classmethod
+    def from_row(cls, row: Any) -> Optional["StarInfo"]:
+        if isinstance(row, dict):
+            return cls.from_api(row)
+        return cls(*row[:len(cls.FIELDS)])
+
+    def __repr__(self) -> str:
+        return f"StarInfo({self.id!r}, {self.name!r})"
+
+
+class MoviePage:
+    """一页搜索/列表结果"""
+
+    __slots__ = ("movies", "has_next")
+
+    def __init__(self, movies: List[Movie], has_next: bool = False):
+        self.movies = movies
+        self.has_next = has_next
+
+    @classmethod
+    def from_api(cls, raw: Any) -> "MoviePage":
+        if not isinstance(raw, dict):
+            return cls([])
+        movies = [Movie.from_api(m) for m in raw.get('movies') or () if isinstance(m, dict)]
+        return cls(movies, bool((raw.get('pagination') or {}).get('hasNextPage')))
+
+    def to_row(self) -> List[Any]:
+        return [[m.to_row() for m in self.movies], int(self.has_next)]
+
+    @classmethod
+    def from_row(cls, row: Any) -> "MoviePage":
+        if isinstance(row, dict):
+            return cls.from_api(row)
+        return cls([Movie.from_row(m) for m in row[0]], bool(row[1]))
+
+
+class MagnetList(list):
+    """一部影片的磁力列表
+
+    与列表本身一起缓存按偏好排序的结果，同一份缓存的列表对同一偏好只排序一次。
+    """
+
+    __slots__ = ("ranked",)
+
+    def __init__(self, magnets=()):
+        super().__init__(magnets)
+        self.ranked: Dict[Tuple, List[Magnet]] = {}
+
+
+def _magnets_from_api(raw: Any) -> MagnetList:
+    return MagnetList(Magnet.from_api(m) for m in raw or () if isinstance(m, dict))
+
+
+class Codec(NamedTuple):
+    """接口数据的解析与存储编码：上游JSON -> 模型 -> 紧凑行"""
+    from_api: Callable[[Any], Any]
+    to_row: Callable[[Any], Any]
+    from_row: Callable[[Any], Any]
+
+
+MOVIE_PAGE = Codec(MoviePage.from_api, MoviePage.to_row, MoviePage.from_row)
+MOVIE_DETAIL = Codec(MovieDetail.from_api, MovieDetail.to_row, MovieDetail.from_row)
+STAR = Codec(StarInfo.from_api, StarInfo.to_row, StarInfo.from_row)
+MAGNETS = Codec(
+    _magnets_from_api,
+    lambda magnets: [m.to_row() for m in magnets],
+    lambda rows: MagnetList(Magnet.from_row(r) for r in rows or ()),
+)
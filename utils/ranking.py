@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from astrbot.core import logger
+from .models import Magnet, parse_size
+from .fileio import atomic_write_json
+
+
+# 偏好关键词 -> (权重字段, 权重)，出现即覆盖默认权重
+PREFERENCE_TOKENS = {
+    '高清': ('hd', 4.0),
+    '字幕': ('subtitle', 4.0),
+    '中字': ('subtitle', 4.0),
+    '大体积': ('size', 2.0),
+    '大': ('size', 2.0),
+    '小体积': ('size', -2.0),
+    '小': ('size', -2.0),
+    '最新': ('recency', 3.0),
+    '新': ('recency', 3.0),
+}
+_MAX_SIZE_RE = re.compile(r"^(?:上限|不超过|小于|<=?|≤)?(\d+(?:\.\d+)?\s*[KMGT]I?B?)(?:以[内下])?$", re.IGNORECASE)
+_SPLIT_RE = re.compile(r"[\s,，;；、]+")
+_RANKED_MAX = 8
+
+
+class MagnetPreference:
+    """磁力排序偏好：各特征的权重和可选的体积上限"""
+
+    __slots__ = ("hd", "subtitle", "size", "recency", "max_size")
+
+    def __init__(self, hd: float = 2.0, subtitle: float = 1.5, size: float = 1.0, recency: float = 0.5,
+                 max_size: int = 0):
+        self.hd = float(hd)
+        self.subtitle = float(subtitle)
+        self.size = float(size)
+        self.recency = float(recency)
+        self.max_size = int(max_size)
+
+    @classmethod
+    def from_config(cls, config) -> "MagnetPreference":
+        return cls(
+            hd=config.get("magnet_weight_hd", 2.0),
+            subtitle=config.get("magnet_weight_subtitle", 1.5),
+            size=config.get("magnet_weight_size", 1.0),
+            recency=config.get("magnet_weight_recency", 0.5),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MagnetPreference":
+        return cls(**{k: data[k] for k in cls.__slots__ if k in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def key(self) -> Tuple:
+        return self.hd, self.subtitle, self.size, self.recency, self.max_size
+
+    def copy(self) -> "MagnetPreference":
+        return MagnetPreference(*self.key())
+
+    def describe(self) -> str:
+        parts = [f"高清×{self.hd:g}", f"字幕×{self.subtitle:g}",
+                 f"体积×{self.size:g}" + ("（偏小）" if self.size < 0 else ""), f"新近×{self.recency:g}"]
+        if self.max_size:
+            parts.append(f"上限 {self.max_size / (1 << 30):g}GB")
+        return "，".join(parts)
+
+
+def parse_preference(text: str, base: MagnetPreference) -> Tuple[Optional[MagnetPreference], List[str]]:
+    """解析“字幕 小体积 上限5G”之类的偏好描述，返回 (偏好, 无法识别的词)
+
+    未提到的特征沿用 base 的权重；没有任何可识别的词时偏好为None。
+    """
+    pref = base.copy()
+    unknown = []
+    matched = False
+    for token in _SPLIT_RE.split(text.strip()):
+        if not token:
+            continue
+        if token in PREFERENCE_TOKENS:
+            field, weight = PREFERENCE_TOKENS[token]
+            setattr(pref, field, weight)
+            matched = True
+            continue
+        size_match = _MAX_SIZE_RE.match(token)
+        if size_match and parse_size(size_match.group(1)):
+            pref.max_size = parse_size(size_match.group(1))
+            matched = True
+            continue
+        unknown.append(token)
+    return (pref if matched else None), unknown
+
+
+def _day(text: str) -> Optional[int]:
+    try:
+        return date.fromisoformat(text[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def rank_magnets(magnets: Sequence[Magnet], pref: MagnetPreference) -> List[Magnet]:
+    """按偏好对磁力列表打分排序，并按infohash去重
+
+    得分 = 高清×权重 + 字幕×权重 + 体积占比×权重 + 新近程度×权重，体积和日期在本列表内归一化到0-1；
+    同分保持上游顺序。设置了体积上限时先过滤，全部超限则忽略上限。
+    传入 MagnetList 时结果缓存在列表上，缓存的列表对同一偏好只计算一次。
+    """
+    ranked_cache = getattr(magnets, 'ranked', None)
+    key = pref.key()
+    if ranked_cache is not None:
+        cached = ranked_cache.get(key)
+        if cached is not None:
+            return cached
+
+    candidates = list(magnets)
+    if pref.max_size:
+        within = [m for m in candidates if 0 < m.size_bytes <= pref.max_size]
+        candidates = within or candidates
+
+    largest = max((m.size_bytes for m in candidates), default=0) or 1
+    days = [_day(m.share_date) for m in candidates]
+    known_days = [d for d in days if d is not None]
+    oldest = min(known_days, default=0)
+    span = (max(known_days, default=0) - oldest) or 1
+
+    scored = []
+    for index, (magnet, day) in enumerate(zip(candidates, days)):
+        score = (pref.hd * magnet.is_hd
+                 + pref.subtitle * magnet.has_subtitle
+                 + pref.size * magnet.size_bytes / largest
+                 + pref.recency * ((day - oldest) / span if day is not None else 0.0))
+        scored.append((-score, index, magnet))
+    scored.sort(key=lambda item: (item[0], item[1]))
+
+    seen = set()
+    result = []
+    for _, _, magnet in scored:
+        if magnet.infohash in seen:
+            continue
+        seen.add(magnet.infohash)
+        result.append(magnet)
+
+    if ranked_cache is not None:
+        if len(ranked_cache) >= _RANKED_MAX:
+            ranked_cache.pop(next(iter(ranked_cache)))
+        ranked_cache[key] = result
+    return result
+
+
+class PreferenceStore:
+    """按用户保存的磁力偏好，持久化到JSON文件"""
+
+    def __init__(self, path: Optional[str], default: MagnetPreference):
+        self.path = path
+        self.default = default
+        self._prefs: Dict[str, MagnetPreference] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for user_id, data in json.load(f).items():
+                    self._prefs[user_id] = MagnetPreference.from_dict(data)
+            logger.info(f"磁力偏好已加载，共 {len(self._prefs)} 位用户")
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"磁力偏好加载失败: {str(e)}")
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        atomic_write_json(self.path, data)
+
+    async def save_async(self) -> None:
+        if not self.path:
+            return
+        snapshot = {user_id: pref.to_dict() for user_id, pref in self._prefs.items()}
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except OSError as e:
+            logger.error(f"磁力偏好保存失败: {str(e)}")
+
+    def get(self, user_id: str) -> MagnetPreference:
+        return self._prefs.get(user_id, self.default)
+
+    def has(self, user_id: str) -> bool:
+        return user_id in self._prefs
+
+    async def set(self, user_id: str, pref: MagnetPreference) -> None:
+        self._prefs[user_id] = pref
+        await self.save_async()
+
+    async def reset(self, user_id: str) -> bool:
+        if self._prefs.pop(user_id, None) is None:
+            return False
+        await self.save_async()
+        return True
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from astrbot.core import logger
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，capacity 为突发上限"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """预占一个令牌，返回需要等待的秒数；等待超过max_wait时不预占并返回None"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        wait = (1 - self.tokens) / self.rate if self.rate > 0 else float('inf')
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+
+class BudgetExhausted(Exception):
+    """全局上游请求预算已用尽，且排队等待超过上限"""
+
+
+class AdmissionController:
+    """
+    搜索命令准入控制
+
+    - 每个用户、每个群各一个令牌桶，超出时立即拒绝，防止单个用户或群刷屏
+    - 全局上游预算一个令牌桶，只在真正请求上游时扣除（缓存命中不消耗），
+      短暂超出时排队等待，等待超过 max_wait 则抛出 BudgetExhausted
+    - 统计命令放行、拒绝次数，以及上游请求、排队、超预算次数
+    """
+
+    def __init__(
+            self,
+            user_rate: float = 10 / 60,
+            user_burst: float = 5,
+            group_rate: float = 30 / 60,
+            group_burst: float = 15,
+            global_rate: float = 2,
+            global_burst: float = 5,
+            max_wait: float = 5,
+            max_buckets: int = 10000
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_wait = max_wait
+        self.max_buckets = max_buckets
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._groups: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.upstream = 0
+        self.queued = 0
+        self.upstream_rejected = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional["AdmissionController"]:
+        if not config.get("rate_limit_enabled", False):
+            return None
+        return cls(
+            user_rate=config.get("rate_limit_user_per_minute", 10) / 60,
+            user_burst=config.get("rate_limit_user_burst", 5),
+            group_rate=config.get("rate_limit_group_per_minute", 30) / 60,
+            group_burst=config.get("rate_limit_group_burst", 15),
+            global_rate=config.get("rate_limit_global_per_second", 2),
+            global_burst=config.get("rate_limit_global_burst", 5),
+            max_wait=config.get("rate_limit_max_wait", 5),
+        )
+
+    def _bucket(self, buckets: "OrderedDict[str, TokenBucket]", key: str, rate: float, burst: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+            while len(buckets) > self.max_buckets:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    async def admit(self, sender_id: str, group_id: Optional[str] = None) -> bool:
+        """判断命令是否放行，只检查用户和群的令牌桶"""
+        user = self._bucket(self._users, str(sender_id), self.user_rate, self.user_burst)
+        group = self._bucket(self._groups, str(group_id), self.group_rate, self.group_burst) if group_id else None
+
+        # 用户和群的令牌都足够时才扣除，避免一方拒绝时另一方白白消耗
+        if not user.available() or (group is not None and not group.available()):
+            self.rejected += 1
+            logger.info(f"请求被限流: 用户 {sender_id}, 群组 {group_id or '私聊'}")
+            return False
+
+        user.try_acquire()
+        if group is not None:
+            group.try_acquire()
+        self.admitted += 1
+        return True
+
+    async def acquire_upstream(self, wait: bool = True) -> None:
+        """请求上游前扣除全局预算，预算不足时排队等待，等待过长时抛出 BudgetExhausted
+
+        wait 为False时不排队（用于对冲请求），没有立即可用的预算就抛出 BudgetExhausted。
+        """
+        delay = self.global_bucket.reserve(self.max_wait if wait else 0)
+        if delay is None:
+            self.upstream_rejected += 1
+            logger.info("全局上游请求预算已用尽，拒绝本次上游请求")
+            raise BudgetExhausted()
+        self.upstream += 1
+        if delay > 0:
+            self.queued += 1
+            logger.info(f"全局上游请求预算不足，排队 {delay:.2f} 秒")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'upstream': self.upstream,
+            'queued': self.queued,
+            'upstream_rejected': self.upstream_rejected,
+        }
@@ -0,0 +1,213 @@
+from string import Formatter
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+# 各类回复可用的字段
+FIELDS = {
+    'movie': ('id', 'title', 'full_title', 'date', 'tags', 'img'),
+    'star': ('id', 'name', 'birthday', 'age', 'height', 'bust', 'waistline', 'hipline', 'avatar'),
+    'detail': ('id', 'title', 'date', 'duration', 'stars', 'director', 'img'),
+    'magnet': ('index', 'title', 'size', 'share_date', 'hd', 'subtitle', 'link'),
+    'bulk': ('id', 'title', 'full_title', 'date'),
+    'push': ('id', 'title', 'full_title', 'date'),
+}
+
+DEFAULT_TEMPLATES = {
+    'movie': "番号: {id}\n标题: {title}\n日期: {date}\n标签: {tags}\n",
+    'star': "姓名: {name}\n生日: {birthday}\n年龄: {age}\n身高: {height}\n三维: {bust} - {waistline} - {hipline}\n",
+    'detail': "【影片详情】\n番号：{id}\n标题：{title}\n日期：{date}\n时长：{duration}\n演员：{stars}\n导演：{director}",
+    'magnet': "{index}. {title} {size}\n{share_date}\n{hd} 字幕：{subtitle}\n{link}",
+    'bulk': "【{id}】{title}\n日期：{date}",
+    'push': "{id} {title} {date}",
+}
+
+
+# 试渲染用的示例值，类型与实际渲染时一致：序号为整数，其余均为字符串
+_SAMPLE_VALUES = {'index': 1}
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+class ReplyTemplate:
+    """预解析的回复模板
+
+    构建时解析 str.format 风格的模板为 (字面量, 字段, 格式说明, 转换) 片段列表并校验字段名，
+    再用示例值试渲染一次，格式说明与字段类型不符（如 {id:d}、{title:{date}}）时在构建时报错，
+    渲染时不再解析模板。
+    """
+
+    __slots__ = ("text", "fields", "parts")
+
+    def __init__(self, text: str, fields: Tuple[str, ...]):
+        self.text = text
+        used: List[str] = []
+        parts: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None:
+                if field not in fields:
+                    raise ValueError(f"未知字段 {{{field}}}，可用字段: {', '.join(fields)}")
+                if conversion not in (None, 's', 'r'):
+                    raise ValueError(f"不支持的转换 !{conversion}")
+                if '{' in spec:
+                    raise ValueError(f"不支持嵌套的格式说明 {{{field}:{spec}}}")
+                if field not in used:
+                    used.append(field)
+            parts.append((literal, field, spec, conversion))
+        self.fields = tuple(used)
+        self.parts = tuple(parts)
+        try:
+            self.render({field: _SAMPLE_VALUES.get(field, '') for field in fields})
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"模板无法渲染: {str(e)}") from e
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        out = []
+        for literal, field, spec, conversion in self.parts:
+            if literal:
+                out.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == 'r':
+                value = repr(value)
+            out.append(format(value, spec) if spec else str(value))
+        return ''.join(out)
+
+
+class Renderer:
+    """
+    各命令共用的回复渲染层
+
+    标题截断、时长换算、演员拼接等逻辑集中在这里；渲染结果缓存在模型的 rendered 上，
+    键为 (模板, 附加参数)。模型随响应缓存刷新重建，相当于按数据版本失效，
+    热门番号的重复查询直接复用渲染好的文本。
+
+    使用示例:
+    renderer = Renderer({'movie': "{id} {title}"})
+    text = renderer.movie(movie)
+    """
+
+    def __init__(self, templates: Optional[Mapping[str, str]] = None):
+        self.templates: Dict[str, ReplyTemplate] = {}
+        self.errors: List[str] = []
+        for kind, fields in FIELDS.items():
+            text = (templates or {}).get(kind) or DEFAULT_TEMPLATES[kind]
+            # 配置界面中输入的换行是字面量 \n
+            text = text.replace('\\n', '\n')
+            try:
+                self.templates[kind] = ReplyTemplate(text, fields)
+            except ValueError as e:
+                self.errors.append(f"{kind}: {str(e)}")
+                self.templates[kind] = ReplyTemplate(DEFAULT_TEMPLATES[kind], fields)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config) -> "Renderer":
+        return cls({kind: config.get(f"template_{kind}", "") for kind in FIELDS})
+
+    def _cached(self, model: Any, kind: str, key: Any, build, *args) -> str:
+        """按 (模板, 附加参数) 缓存渲染结果；key 为None时只以模板为键"""
+        template = self.templates[kind]
+        key = template if key is None else (template, key)
+        rendered = model.rendered
+        if rendered is None:
+            rendered = model.rendered = {}
+        else:
+            text = rendered.get(key)
+            if text is not None:
+                self.hits += 1
+                return text
+        self.misses += 1
+        text = rendered[key] = template.render(build(*args))
+        return text
+
+    def movie(self, movie, translations: Optional[Mapping[str, str]] = None) -> str:
+        """搜索结果中的一部影片；有译文时不缓存"""
+        if translations:
+            title = translations.get(movie.title) or movie.title
+            tags = [translations.get(tag) or tag for tag in movie.tags]
+            return self.templates['movie'].render(self._movie_values(movie, title, tags))
+        return self._cached(movie, 'movie', None, self._movie_values, movie, movie.title, movie.tags)
+
+    @staticmethod
+    def _movie_values(movie, title: str, tags) -> Dict[str, Any]:
+        return {
+            'id': movie.id,
+            'title': _truncate(title, 20),
+            'full_title': title,
+            'date': movie.date,
+            'tags': ', '.join(tags),
+            'img': movie.img,
+        }
+
+    def star(self, star) -> str:
+        return self._cached(star, 'star', None, self._star_values, star)
+
+    @staticmethod
+    def _star_values(star) -> Dict[str, Any]:
+        return {field: getattr(star, field) for field in FIELDS['star']}
+
+    def detail(self, detail) -> str:
+        return self._cached(detail, 'detail', None, self._detail_values, detail)
+
+    @staticmethod
+    def _detail_values(detail) -> Dict[str, Any]:
+        if detail.video_length is not None:
+            duration = f"{detail.video_length // 60}小时{detail.video_length % 60}分钟"
+        else:
+            duration = "未知"
+        stars = "暂无演员信息"
+        if detail.stars:
+            stars = "、".join(star.name for star in detail.stars[:3])
+            if len(detail.stars) > 3:
+                stars += f" 等{len(detail.stars)}人"
+        return {
+            'id': detail.id,
+            'title': detail.title or 'N/A',
+            'date': detail.date or 'N/A',
+            'duration': duration,
+            'stars': stars,
+            'director': detail.director or "未知",
+            'img': detail.img,
+        }
+
+    def magnet(self, index: int, magnet) -> str:
+        return self._cached(magnet, 'magnet', index, self._magnet_values, index, magnet)
+
+    @staticmethod
+    def _magnet_values(index: int, magnet) -> Dict[str, Any]:
+        return {
+            'index': index,
+            'title': magnet.title,
+            'size': magnet.size,
+            'share_date': magnet.share_date,
+            'hd': ' 高清' if magnet.is_hd else '',
+            'subtitle': '有' if magnet.has_subtitle else '无',
+            'link': magnet.link,
+        }
+
+    def _short(self, movie, kind: str, limit: int) -> str:
+        return self._cached(movie, kind, None, self._short_values, movie, limit)
+
+    @staticmethod
+    def _short_values(movie, limit: int) -> Dict[str, Any]:
+        return {
+            'id': movie.id,
+            'title': _truncate(movie.title or 'N/A', limit),
+            'full_title': movie.title,
+            'date': movie.date or 'N/A',
+        }
+
+    def bulk(self, detail) -> str:
+        """批量磁力查询中单个番号的标题行"""
+        return self._short(detail, 'bulk', 30)
+
+    def push(self, movie) -> str:
+        """订阅推送中的一行"""
+        return self._short(movie, 'push', 20)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from astrbot.core import logger
+
+
+class SingleFlight:
+    """
+    并发请求合并
+
+    同一个键在上一次请求完成前再次被请求时，不再发起新的上游调用，
+    而是等待同一个任务的结果。与缓存相互独立，可以单独使用。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """执行fn，若同键请求正在进行则共享其结果"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug("合并并发请求: %s", key)
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._forget(k, _t))
+        # shield: 某个调用方被取消时不影响其它等待同一结果的调用方
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 取出异常，避免所有调用方都已取消时出现 "exception was never retrieved"
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'inflight': len(self._inflight),
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+        }
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from astrbot.core import logger
+from .fileio import atomic_write_json
+
+
+# 平假名 -> 罗马音（平文式），拗音优先匹配
+_KANA_DIGRAPHS = {
+    'きゃ': 'kya', 'きゅ': 'kyu', 'きょ': 'kyo', 'しゃ': 'sha', 'しゅ': 'shu', 'しょ': 'sho',
+    'ちゃ': 'cha', 'ちゅ': 'chu', 'ちょ': 'cho', 'にゃ': 'nya', 'にゅ': 'nyu', 'にょ': 'nyo',
+    'ひゃ': 'hya', 'ひゅ': 'hyu', 'ひょ': 'hyo', 'みゃ': 'mya', 'みゅ': 'myu', 'みょ': 'myo',
+    'りゃ': 'rya', 'りゅ': 'ryu', 'りょ': 'ryo', 'ぎゃ': 'gya', 'ぎゅ': 'gyu', 'ぎょ': 'gyo',
+    'じゃ': 'ja', 'じゅ': 'ju', 'じょ': 'jo', 'びゃ': 'bya', 'びゅ': 'byu', 'びょ': 'byo',
+    'ぴゃ': 'pya', 'ぴゅ': 'pyu', 'ぴょ': 'pyo',
+}
+_KANA = {
+    'あ': 'a', 'い': 'i', 'う': 'u', 'え': 'e', 'お': 'o',
+    'か': 'ka', 'き': 'ki', 'く': 'ku', 'け': 'ke', 'こ': 'ko',
+    'さ': 'sa', 'し': 'shi', 'す': 'su', 'せ': 'se', 'そ': 'so',
+    'た': 'ta', 'ち': 'chi', 'つ': 'tsu', 'て': 'te', 'と': 'to',
+    'な': 'na', 'に': 'ni', 'ぬ': 'nu', 'ね': 'ne', 'の': 'no',
+    'は': 'ha', 'ひ': 'hi', 'ふ': 'fu', 'へ': 'he', 'ほ': 'ho',
+    'ま': 'ma', 'み': 'mi', 'む': 'mu', 'め': 'me', 'も': 'mo',
+    'や': 'ya', 'ゆ': 'yu', 'よ': 'yo',
+    'ら': 'ra', 'り': 'ri', 'る': 'ru', 'れ': 're', 'ろ': 'ro',
+    'わ': 'wa', 'を': 'o', 'ん': 'n',
+    'が': 'ga', 'ぎ': 'gi', 'ぐ': 'gu', 'げ': 'ge', 'ご': 'go',
+    'ざ': 'za', 'じ': 'ji', 'ず': 'zu', 'ぜ': 'ze', 'ぞ': 'zo',
+    'だ': 'da', 'ぢ': 'ji', 'づ': 'zu', 'で': 'de', 'ど': 'do',
+    'ば': 'ba', 'び': 'bi', 'ぶ': 'bu', 'べ': 'be', 'ぼ': 'bo',
+    'ぱ': 'pa', 'ぴ': 'pi', 'ぷ': 'pu', 'ぺ': 'pe', 'ぽ': 'po',
+    'ぁ': 'a', 'ぃ': 'i', 'ぅ': 'u', 'ぇ': 'e', 'ぉ': 'o', 'ゔ': 'vu',
+}
+_STRIP_RE = re.compile(r"[\s\-_.・･、，,()（）\[\]【】「」'\"]+")
+
+
+def _katakana_to_hiragana(text: str) -> str:
+    return ''.join(chr(ord(c) - 0x60) if 'ァ' <= c <= 'ヶ' else c for c in text)
+
+
+def kana_to_romaji(text: str) -> str:
+    """将假名转换为罗马音，非假名字符原样保留"""
+    text = _katakana_to_hiragana(text)
+    result = []
+    i = 0
+    while i < len(text):
+        pair = text[i:i + 2]
+        if pair in _KANA_DIGRAPHS:
+            result.append(_KANA_DIGRAPHS[pair])
+            i += 2
+            continue
+        char = text[i]
+        if char == 'っ' and i + 1 < len(text):
+            # 促音：重复下一个音节的首辅音
+            nxt = _KANA_DIGRAPHS.get(text[i + 1:i + 3]) or _KANA.get(text[i + 1], '')
+            result.append(nxt[:1] if nxt[:1] not in 'aiueo' else '')
+        elif char == 'ー':
+            # 长音：重复前一个元音
+            result.append(result[-1][-1:] if result else '')
+        else:
+            result.append(_KANA.get(char, char))
+        i += 1
+    return ''.join(result)
+
+
+def normalize_name(name: str) -> str:
+    """统一全半角、大小写、空白和标点，片假名转为平假名"""
+    name = unicodedata.normalize('NFKC', str(name)).lower()
+    return _katakana_to_hiragana(_STRIP_RE.sub('', name))
+
+
+def _name_keys(name: str) -> Set[str]:
+    """一个名称对应的所有索引键：规范化形式、罗马音形式、姓名对调形式"""
+    keys = set()
+    normalized = normalize_name(name)
+    if normalized:
+        keys.add(normalized)
+        romaji = kana_to_romaji(normalized)
+        if romaji != normalized:
+            keys.add(romaji)
+    parts = unicodedata.normalize('NFKC', str(name)).lower().split()
+    if len(parts) == 2:
+        keys.add(normalize_name(parts[1] + parts[0]))
+    return keys
+
+
+def _ngrams(key: str, n: int = 2) -> Set[str]:
+    if len(key) < n:
+        return {key}
+    return {key[i:i + n] for i in range(len(key) - n + 1)}
+
+
+class StarIndex:
+    """
+    本地演员名称索引
+
+    功能:
+    - 从插件看到的影片/演员数据中增量收集 演员ID <-> 名称
+    - 支持精确、前缀、假名/罗马音互查和基于二元组的模糊匹配
+    - 用户输入成功解析到演员后记为别名，下次直接命中（跨文字查询）
+    - 持久化到JSON文件，重启后继续可用
+
+    使用示例:
+    index = StarIndex("data/javbus_search/star_index.json")
+    index.observe_star({"id": "okq", "name": "三上悠亜"})
+    index.lookup("三上")  # [("okq", "三上悠亜", 0.9)]
+    """
+
+    EXACT_SCORE = 1.0
+    PREFIX_SCORE = 0.9
+    # 模糊匹配分数上限，始终低于前缀匹配，resolve 据此区分可信匹配和提示
+    FUZZY_SCALE = 0.8
+
+    def __init__(self, path: Optional[str] = None, fuzzy_threshold: float = 0.6, save_interval: float = 60):
+        self.path = path
+        self.fuzzy_threshold = fuzzy_threshold
+        self.save_interval = save_interval
+
+        self._names: Dict[str, str] = {}                 # 演员ID -> 显示名称
+        self._aliases: Dict[str, Set[str]] = {}          # 演员ID -> 所有已知名称
+        self._keys: Dict[str, Set[str]] = {}             # 索引键 -> 演员ID集合
+        self._sorted_keys: List[str] = []                # 有序索引键，用于前缀查找
+        self._sorted_dirty = False
+        self._grams: Dict[str, Set[str]] = {}            # 二元组 -> 索引键集合
+
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.lookups = 0
+        self.hits = 0
+
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, star_id: str, name: str, alias: bool = False) -> None:
+        """添加演员名称；alias为True时不覆盖显示名称"""
+        if not star_id or not name:
+            return
+        star_id = str(star_id)
+        name = str(name).strip()
+        known = self._aliases.setdefault(star_id, set())
+        if not alias or star_id not in self._names:
+            self._names[star_id] = name
+        if name in known:
+            return
+        known.add(name)
+        for key in _name_keys(name):
+            ids = self._keys.get(key)
+            if ids is None:
+                ids = self._keys[key] = set()
+                self._sorted_dirty = True
+                for gram in _ngrams(key):
+                    self._grams.setdefault(gram, set()).add(key)
+            ids.add(star_id)
+        self._dirty = True
+
+    def observe_star(self, star: Any) -> None:
+        """收录演员，支持接口原始字典和 StarInfo/StarRef 模型"""
+        if isinstance(star, dict):
+            self.add(star.get('id'), star.get('name'))
+        elif star is not None:
+            self.add(getattr(star, 'id', None), getattr(star, 'name', None))
+
+    def observe_movie(self, movie: Any) -> None:
+        if isinstance(movie, dict):
+            stars = movie.get('stars') or []
+        else:
+            stars = getattr(movie, 'stars', ())
+        for star in stars:
+            self.observe_star(star)
+
+    def observe_movies(self, movies: Iterable[Any]) -> None:
+        for movie in movies or []:
+            self.observe_movie(movie)
+
+    def _prefix_keys(self, prefix: str) -> List[str]:
+        if self._sorted_dirty:
+            self._sorted_keys = sorted(self._keys)
+            self._sorted_dirty = False
+        keys = []
+        i = bisect_left(self._sorted_keys, prefix)
+        while i < len(self._sorted_keys) and self._sorted_keys[i].startswith(prefix):
+            keys.append(self._sorted_keys[i])
+            i += 1
+        return keys
+
+    def lookup(self, name: str, limit: int = 5) -> List[Tuple[str, str, float]]:
+        """查找演员
+
+        Returns:
+            [(演员ID, 显示名称, 匹配分数)]，按分数降序
+        """
+        self.lookups += 1
+        scores: Dict[str, float] = {}
+        query_keys = _name_keys(name)
+
+        def offer(star_ids: Iterable[str], score: float):
+            for sid in star_ids:
+                if score > scores.get(sid, 0):
+                    scores[sid] = score
+
+        for query in query_keys:
+            offer(self._keys.get(query, ()), self.EXACT_SCORE)
+            for key in self._prefix_keys(query):
+                offer(self._keys[key], self.PREFIX_SCORE)
+
+        if not scores:
+            # 模糊匹配：二元组 Dice 系数
+            for query in query_keys:
+                grams = _ngrams(query)
+                counts: Dict[str, int] = {}
+                for gram in grams:
+                    for key in self._grams.get(gram, ()):
+                        counts[key] = counts.get(key, 0) + 1
+                for key, common in counts.items():
+                    score = 2 * common / (len(grams) + len(_ngrams(key)))
+                    if score >= self.fuzzy_threshold:
+                        offer(self._keys[key], round(score * self.FUZZY_SCALE, 4))
+
+        if scores:
+            self.hits += 1
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [(sid, self._names.get(sid, ''), score) for sid, score in ranked]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """名称或别名精确匹配唯一演员、或前缀只匹配到一位演员时返回演员ID，否则返回None
+
+        模糊匹配只作为提示（见 lookup），不直接解析：一字之差往往是另一位演员。
+        """
+        matches = self.lookup(name, limit=2)
+        if not matches:
+            return None
+        top_score = matches[0][2]
+        if top_score >= self.EXACT_SCORE:
+            # 多个候选时只接受唯一的精确匹配
+            if len(matches) == 1 or matches[1][2] < self.EXACT_SCORE:
+                return matches[0][0]
+            return None
+        if top_score >= self.PREFIX_SCORE and len(matches) == 1:
+            return matches[0][0]
+        return None
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for star_id, names in data.get('stars', {}).items():
+                display, *aliases = names
+                self.add(star_id, display)
+                for alias in aliases:
+                    self.add(star_id, alias, alias=True)
+            self._dirty = False
+            logger.info(f"演员索引已加载，共 {len(self._names)} 位演员")
+        except (OSError, ValueError) as e:
+            logger.error(f"演员索引加载失败: {str(e)}")
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'stars': {
+                sid: [self._names[sid]] + sorted(self._aliases[sid] - {self._names[sid]})
+                for sid in self._names
+            }
+        }
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        atomic_write_json(self.path, data)
+
+    def save(self) -> None:
+        """立即落盘"""
+        if not self.path or not self._dirty:
+            return
+        try:
+            self._write(self._snapshot())
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except OSError as e:
+            logger.error(f"演员索引保存失败: {str(e)}")
+
+    async def maybe_save(self) -> None:
+        """距上次保存超过save_interval时才落盘，文件写入在线程池中执行"""
+        if not self.path or not self._dirty or time.monotonic() - self._last_save < self.save_interval:
+            return
+        data = self._snapshot()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        try:
+            await asyncio.to_thread(self._write, data)
+            logger.debug("演员索引已保存，共 %d 位演员", len(data['stars']))
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"演员索引保存失败: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'stars': len(self._names),
+            'keys': len(self._keys),
+            'lookups': self.lookups,
+            'hits': self.hits,
+        }
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from astrbot.core import logger
+from .models import dumps, loads
+
+
+class MetadataStore:
+    """
+    基于SQLite的本地元数据存储
+
+    功能:
+    - 持久化影片详情、磁力链接和演员详情，重启后无需重新请求
+    - WAL模式，读写互不阻塞
+    - 按影片ID、演员ID、演员名称建立索引
+    - 每类数据可配置新鲜期，过期数据在上游不可用时仍可兜底返回
+
+    所有SQLite操作都在线程池中执行，不阻塞事件循环。
+    """
+
+    TABLES = ('movies', 'magnets', 'stars')
+
+    DEFAULT_MAX_AGE = {
+        'movies': 7 * 86400,
+        'magnets': 86400,
+        'stars': 7 * 86400,
+    }
+
+    def __init__(self, db_path: str, max_age: Optional[Dict[str, float]] = None):
+        self.db_path = db_path
+        self.max_age = {**self.DEFAULT_MAX_AGE, **(max_age or {})}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_db()
+        logger.info(f"本地元数据存储已打开: {db_path}")
+
+    def _init_db(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS movies (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS magnets (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS stars (
+                    key TEXT PRIMARY KEY,
+                    name TEXT,
+                    payload TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_stars_name ON stars(name);
+                """
+            )
+            self._conn.commit()
+
+    def _get_sync(self, table: str, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT payload, updated_at FROM {table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return loads(row[0]), row[1]
+
+    def _put_sync(self, table: str, key: str, payload: Any, name: Optional[str] = None) -> None:
+        data = dumps(payload)
+        now = time.time()
+        with self._lock:
+            if table == 'stars':
+                if name is None and isinstance(payload, dict):
+                    name = payload.get('name')
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO stars (key, name, payload, updated_at) VALUES (?, ?, ?, ?)",
+                    (key, name, data, now)
+                )
+            else:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {table} (key, payload, updated_at) VALUES (?, ?, ?)",
+                    (key, data, now)
+                )
+            self._conn.commit()
+
+    def _find_stars_sync(self, name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM stars WHERE name = ? ORDER BY updated_at DESC", (name,)
+            ).fetchall()
+        return [loads(row[0]) for row in rows]
+
+    async def get(self, table: str, key: str) -> Optional[Tuple[Any, bool]]:
+        """读取记录，返回 (数据, 是否在新鲜期内)，不存在返回None"""
+        if table not in self.TABLES:
+            raise ValueError(f"未知的存储表: {table}")
+        try:
+            row = await asyncio.to_thread(self._get_sync, table, key)
+        except sqlite3.Error as e:
+            logger.error(f"读取本地存储失败 {table}/{key}: {str(e)}")
+            return None
+        if row is None:
+            return None
+        payload, updated_at = row
+        return payload, time.time() - updated_at < self.max_age.get(table, 0)
+
+    async def put(self, table: str, key: str, payload: Any, name: Optional[str] = None) -> None:
+        """写入或覆盖记录；payload 为紧凑行时通过 name 指定演员名称索引"""
+        if table not in self.TABLES:
+            raise ValueError(f"未知的存储表: {table}")
+        if not payload:
+            return
+        try:
+            await asyncio.to_thread(self._put_sync, table, key, payload, name)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"写入本地存储失败 {table}/{key}: {str(e)}")
+
+    async def find_stars_by_name(self, name: str) -> List[Any]:
+        """按演员名称精确查找已存储的演员详情"""
+        try:
+            return await asyncio.to_thread(self._find_stars_sync, name)
+        except sqlite3.Error as e:
+            logger.error(f"按名称查询演员失败 {name}: {str(e)}")
+            return []
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
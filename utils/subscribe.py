@@ -0,0 +1,296 @@
+import asyncio
+import json
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from astrbot.core import logger
+from .models import Movie, MoviePage
+from .fileio import atomic_write_json
+
+
+# 订阅类型别名 -> javbus-api 的 filterType；keyword 走关键词搜索
+KIND_ALIASES = {
+    '演员': 'star', '女优': 'star', 'star': 'star',
+    '类别': 'genre', '标签': 'genre', 'genre': 'genre',
+    '导演': 'director', 'director': 'director',
+    '制作商': 'studio', 'studio': 'studio',
+    '发行商': 'label', 'label': 'label',
+    '系列': 'series', 'series': 'series',
+    '关键词': 'keyword', 'keyword': 'keyword',
+}
+# 按 javbus 的ID过滤的类型，filterValue 必须是ID而不是名称
+ID_KINDS = ('genre', 'director', 'studio', 'label', 'series')
+_FILTER_ID_RE = re.compile(r"[0-9a-z]+", re.IGNORECASE)
+KIND_NAMES = {
+    'star': '演员', 'genre': '类别', 'director': '导演', 'studio': '制作商',
+    'label': '发行商', 'series': '系列', 'keyword': '关键词',
+}
+
+
+def parse_kind(text: str) -> Tuple[Optional[str], str]:
+    """拆分“类型 值”，类型与值之间可以没有空格，如“演员三上悠亚”"""
+    text = text.strip()
+    for alias in sorted(KIND_ALIASES, key=len, reverse=True):
+        if text.lower().startswith(alias):
+            return KIND_ALIASES[alias], text[len(alias):].strip()
+    return None, text
+
+
+def parse_filter_id(text: str) -> Tuple[Optional[str], str]:
+    """拆分“ID 名称”，如“4 巨乳”；ID取自javbus页面地址（/genre/4），名称可省略，仅用于显示
+
+    Returns:
+        (ID, 显示名称)，第一段不是ID时ID为None
+    """
+    value, _, title = text.strip().partition(' ')
+    if not _FILTER_ID_RE.fullmatch(value):
+        return None, text
+    return value.lower(), title.strip()
+
+
+class Subscription:
+    """一个订阅键（类型 + 值）及其订阅会话，多个会话共享一次增量抓取"""
+
+    __slots__ = ("kind", "value", "title", "origins", "seen", "initialized")
+
+    def __init__(self, kind: str, value: str, title: str = "",
+                 origins: Optional[Set[str]] = None, seen: Optional[List[str]] = None,
+                 initialized: bool = False):
+        self.kind = kind
+        self.value = value
+        self.title = title or value
+        self.origins: Set[str] = origins or set()
+        # 最近见过的番号，新片在前
+        self.seen: List[str] = seen or []
+        # 是否已建立基线；首次抓取可能为空，不能用 seen 是否为空判断
+        self.initialized = initialized
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.kind, self.value
+
+    def describe(self) -> str:
+        return f"{KIND_NAMES.get(self.kind, self.kind)} {self.title}"
+
+
+class SubscriptionManager:
+    """
+    新片订阅
+
+    功能:
+    - 按会话订阅演员/类别/导演/制作商/发行商/系列/关键词
+    - 同一订阅键只抓取一次，结果推送给所有订阅的会话
+    - 增量抓取：从第一页开始，遇到已见过的番号即停止翻页
+    - 首次抓取只建立基线，不推送历史影片
+    - 订阅和已见番号持久化到JSON文件
+    """
+
+    def __init__(
+            self,
+            api,
+            path: Optional[str],
+            notify: Callable[[str, Subscription, List[Movie]], Awaitable[None]],
+            interval: float = 1800,
+            max_pages: int = 3,
+            concurrency: int = 2,
+            max_per_origin: int = 20,
+            seen_size: int = 200
+    ):
+        self.api = api
+        self.path = path
+        self.notify = notify
+        self.interval = max(60.0, float(interval))
+        self.max_pages = max(1, int(max_pages))
+        self.concurrency = max(1, int(concurrency))
+        self.max_per_origin = max_per_origin
+        self.seen_size = seen_size
+        self._subs: Dict[Tuple[str, str], Subscription] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        self.polls = 0
+        self.pages_fetched = 0
+        self.pushed = 0
+        self.errors = 0
+        self.load()
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for item in json.load(f).get('subscriptions', []):
+                    sub = Subscription(item['kind'], item['value'], item.get('title', ''),
+                                       set(item.get('origins', [])), item.get('seen', []),
+                                       item.get('initialized', bool(item.get('seen'))))
+                    if sub.origins:
+                        self._subs[sub.key] = sub
+            logger.info(f"订阅已加载，共 {len(self._subs)} 个订阅键")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"订阅加载失败: {str(e)}")
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'subscriptions': [
+                {'kind': s.kind, 'value': s.value, 'title': s.title,
+                 'origins': sorted(s.origins), 'seen': s.seen, 'initialized': s.initialized}
+                for s in self._subs.values()
+            ]
+        }
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        atomic_write_json(self.path, data)
+
+    def save(self) -> None:
+        """立即落盘"""
+        if not self.path:
+            return
+        try:
+            self._write(self._snapshot())
+        except OSError as e:
+            logger.error(f"订阅保存失败: {str(e)}")
+
+    async def save_async(self) -> None:
+        if not self.path:
+            return
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except OSError as e:
+            logger.error(f"订阅保存失败: {str(e)}")
+
+    def for_origin(self, origin: str) -> List[Subscription]:
+        return [sub for sub in self._subs.values() if origin in sub.origins]
+
+    async def add(self, origin: str, kind: str, value: str, title: str = "") -> Tuple[Optional[Subscription], str]:
+        """添加订阅，返回 (订阅, 提示)；超出数量上限时订阅为None"""
+        sub = self._subs.get((kind, value))
+        if sub is not None and origin in sub.origins:
+            return sub, "已订阅"
+        if len(self.for_origin(origin)) >= self.max_per_origin:
+            return None, f"每个会话最多订阅 {self.max_per_origin} 项"
+        if sub is None:
+            sub = self._subs[(kind, value)] = Subscription(kind, value, title)
+        sub.origins.add(origin)
+        await self.save_async()
+        return sub, "订阅成功"
+
+    async def remove(self, origin: str, kind: str, value: str) -> bool:
+        sub = self._subs.get((kind, value))
+        if sub is None:
+            # 按显示名称取消，如演员订阅保存的是演员ID
+            sub = next((s for s in self.for_origin(origin) if s.kind == kind and s.title == value), None)
+        if sub is None or origin not in sub.origins:
+            return False
+        sub.origins.discard(origin)
+        if not sub.origins:
+            del self._subs[sub.key]
+        await self.save_async()
+        return True
+
+    def start(self) -> bool:
+        """启动后台轮询；没有运行中的事件循环时返回False，稍后再试"""
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        except RuntimeError:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.save()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"订阅轮询失败: {str(e)}", exc_info=True)
+
+    async def poll_once(self) -> int:
+        """轮询所有订阅键，返回推送的新片总数"""
+        async with self._lock:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def bounded(sub: Subscription) -> int:
+                async with semaphore:
+                    return await self._poll(sub)
+
+            counts = await asyncio.gather(*(bounded(sub) for sub in list(self._subs.values())))
+            self.polls += 1
+            if self._subs:
+                await self.save_async()
+            return sum(counts)
+
+    async def _fetch_page(self, sub: Subscription, page: int) -> MoviePage:
+        # magnet=all 保证列表按发行顺序排列，不会因为磁力出现较晚而错位
+        if sub.kind == 'keyword':
+            return await self.api.search_movies(sub.value, page=page, magnet="all")
+        return await self.api.get_movies(page=page, magnet="all", filter_type=sub.kind, filter_value=sub.value)
+
+    async def _poll(self, sub: Subscription) -> int:
+        seen = set(sub.seen)
+        new_movies: List[Movie] = []
+        try:
+            for page in range(1, self.max_pages + 1):
+                data = await self._fetch_page(sub, page)
+                self.pages_fetched += 1
+                reached_seen = False
+                for movie in data.movies:
+                    if not movie.id:
+                        continue
+                    if movie.id in seen:
+                        reached_seen = True
+                        break
+                    new_movies.append(movie)
+                # 基线只需要第一页
+                if reached_seen or not sub.initialized or not data.has_next:
+                    break
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"订阅 {sub.describe()} 抓取失败: {str(e)}")
+            return 0
+
+        baseline = not sub.initialized
+        sub.initialized = True
+        sub.seen = ([m.id for m in new_movies] + sub.seen)[:self.seen_size]
+        if baseline or not new_movies:
+            return 0
+
+        logger.info(f"订阅 {sub.describe()} 有 {len(new_movies)} 部新片，推送给 {len(sub.origins)} 个会话")
+        for origin in list(sub.origins):
+            try:
+                await self.notify(origin, sub, new_movies)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"订阅推送失败 {origin}: {str(e)}")
+        self.pushed += len(new_movies)
+        return len(new_movies)
+
+    async def prime(self, sub: Subscription) -> None:
+        """新订阅立即建立基线，避免下一轮把当前已有影片当作新片"""
+        if not sub.initialized:
+            async with self._lock:
+                await self._poll(sub)
+                await self.save_async()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'keys': len(self._subs),
+            'origins': len({o for s in self._subs.values() for o in s.origins}),
+            'polls': self.polls,
+            'pages': self.pages_fetched,
+            'pushed': self.pushed,
+            'errors': self.errors,
+        }
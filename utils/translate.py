@@ -1,12 +1,96 @@
 import asyncio
 import hashlib
 import json
+import os
 import random
 import time
+from collections import OrderedDict
 import aiohttp
-from typing import Dict, Optional, LiteralString
+from typing import Dict, List, Optional, LiteralString, Tuple
 from astrbot.core import logger
 
+from .breaker import RetryPolicy, get_breaker
+from .fileio import atomic_write_json
+
+
+class TranslationCache:
+    """
+    翻译结果缓存
+
+    以 (原文, 源语言, 目标语言) 为键，LRU 淘汰，定期持久化到JSON文件，
+    重复的演员名称无需再次调用翻译接口。
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 4096, save_interval: float = 60):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.save_interval = save_interval
+        self._entries: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @staticmethod
+    def _key(text: str, from_lang: str, to_lang: str) -> Tuple[str, str, str]:
+        return text.strip(), from_lang, to_lang
+
+    def get(self, text: str, from_lang: str, to_lang: str) -> Optional[str]:
+        key = self._key(text, from_lang, to_lang)
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def set(self, text: str, from_lang: str, to_lang: str, result: str) -> None:
+        if not result:
+            return
+        key = self._key(text, from_lang, to_lang)
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for text, from_lang, to_lang, result in json.load(f)[-self.max_entries:]:
+                    self._entries[(text, from_lang, to_lang)] = result
+            logger.info(f"翻译缓存已加载，共 {len(self._entries)} 条")
+        except (OSError, ValueError) as e:
+            logger.error(f"翻译缓存加载失败: {str(e)}")
+
+    def _write(self, rows) -> None:
+        atomic_write_json(self.path, rows)
+
+    async def maybe_save(self, force: bool = False) -> None:
+        """距上次保存超过save_interval时落盘，文件写入在线程池中执行"""
+        if not self.path or not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < self.save_interval:
+            return
+        rows = [[*key, result] for key, result in self._entries.items()]
+        self._dirty = False
+        self._last_save = time.monotonic()
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"翻译缓存保存失败: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
 
 class BaiduTranslator():
     """
@@ -72,22 +156,57 @@ class BaiduTranslator():
         90107: '认证未通过或未生效'
     }
 
-    def __init__(self, appid: str, secret_key: str):
+    def __init__(
+            self,
+            appid: str,
+            secret_key: str,
+            cache_path: Optional[str] = None,
+            cache_size: int = 4096,
+            batch_window: float = 0.05,
+            max_batch_chars: int = 2000,
+            retry_policy: Optional[RetryPolicy] = None
+    ):
         """初始化翻译器"""
         self.api_url = 'https://fanyi-api.baidu.com/api/trans/vip/translate'
 
+        # 长连接会话在首次请求时创建，所有翻译请求共享
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = TranslationCache(cache_path, cache_size)
+
+        # 批量翻译：时间窗口内的请求合并为一次多行查询
+        self.batch_window = batch_window
+        self.max_batch_chars = max_batch_chars
+        self._batches: Dict[Tuple[str, str], List[Tuple[str, asyncio.Future]]] = {}
+        self._pending_texts: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._batch_tasks = set()
+
         # 获取API凭证
         self.appid = appid
         self.secret_key = secret_key
         
-        # 用于Google翻译的等待时间变量
-        self._google_trans_wait = 60
+        # 翻译服务熔断器在所有翻译器实例间共享
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.google_breaker = get_breaker("google_translate")
+        self.baidu_breaker = get_breaker("baidu_translate")
 
-        logger.info(f"appid: {self.appid} secret_key: {self.secret_key}")
+        # 百度凭证不完整时不影响插件加载，单条翻译改用Google，批量翻译保留原文
+        if self.appid and self.secret_key:
+            logger.info(f"百度翻译已配置，appid: {self.appid}")
+        else:
+            logger.warning("百度翻译API配置不完整，将使用Google翻译")
 
-        if not all([self.appid, self.secret_key]):
-            logger.error("百度翻译API配置不完整，请检查config.ini文件")
-            raise ValueError("百度翻译API配置不完整")
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的HTTP会话，保持连接复用"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """关闭会话并保存翻译缓存"""
+        await self.cache.maybe_save(force=True)
+        if self._session and not self._session.closed:
+            await self._session.close()
 
     async def _generate_sign(self, query: str, salt: str) -> str:
         """
@@ -123,6 +242,127 @@ class BaiduTranslator():
             logger.warning(f"不支持的目标语言代码: {to_lang}")
             return None
 
+        cached = self.cache.get(query, from_lang, to_lang)
+        if cached is not None:
+            logger.info(f"翻译缓存命中: {query[:50]}")
+            return cached
+
+        if kwargs:
+            # 带额外参数的请求无法与其它请求合并
+            lines = await self._request_baidu(query, from_lang, to_lang, **kwargs)
+            result = ''.join(item['dst'] for item in lines) if lines else None
+        else:
+            # 短时间窗口内的翻译请求合并为一次批量请求
+            result = await asyncio.shield(self._enqueue(query, from_lang, to_lang))
+        if result:
+            self.cache.set(query, from_lang, to_lang, result)
+            await self.cache.maybe_save()
+        return result
+
+    async def translate_many(
+            self,
+            texts: List[str],
+            from_lang: str = 'auto',
+            to_lang: str = 'zh'
+    ) -> List[Optional[str]]:
+        """批量翻译
+
+        未命中缓存的文本与同一时间窗口内其它翻译请求合并，按百度接口的多行查询
+        一次发出，再按行拆分回各自的调用方。
+
+        Returns:
+            与texts一一对应的译文，失败的项为None
+        """
+        if from_lang not in self.LANGUAGE_MAP or to_lang not in self.LANGUAGE_MAP:
+            logger.warning(f"不支持的语言方向: {from_lang} -> {to_lang}")
+            return [None] * len(texts)
+
+        results: Dict[str, Optional[str]] = {}
+        for text in texts:
+            if text and text not in results:
+                results[text] = self.cache.get(text, from_lang, to_lang)
+
+        misses = [text for text, result in results.items() if result is None]
+        if misses:
+            logger.info(f"批量翻译: 共 {len(results)} 条，缓存未命中 {len(misses)} 条")
+            translated = await asyncio.gather(
+                *(asyncio.shield(self._enqueue(text, from_lang, to_lang)) for text in misses)
+            )
+            for text, result in zip(misses, translated):
+                results[text] = result
+                if result:
+                    self.cache.set(text, from_lang, to_lang, result)
+            await self.cache.maybe_save()
+
+        return [results.get(text) if text else None for text in texts]
+
+    def _enqueue(self, text: str, from_lang: str, to_lang: str) -> "asyncio.Future[Optional[str]]":
+        """把文本加入当前批次，返回该文本译文的Future"""
+        line = ' '.join(text.split())
+        key = (line, from_lang, to_lang)
+        future = self._pending_texts.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_texts[key] = future
+        future.add_done_callback(lambda _f, k=key: self._pending_texts.pop(k, None))
+
+        batch_key = (from_lang, to_lang)
+        batch = self._batches.setdefault(batch_key, [])
+        batch.append((line, future))
+        if sum(len(item[0]) + 1 for item in batch) >= self.max_batch_chars:
+            self._flush(batch_key)
+        elif len(batch) == 1:
+            loop.call_later(self.batch_window, self._flush, batch_key)
+        return future
+
+    def _flush(self, batch_key: Tuple[str, str]) -> None:
+        """发送当前批次"""
+        batch = self._batches.pop(batch_key, None)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send_batch(batch, *batch_key))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: List[Tuple[str, asyncio.Future]], from_lang: str, to_lang: str) -> None:
+        """按长度上限拆包发送，并把逐行结果分发回Future"""
+        chunks: List[List[Tuple[str, asyncio.Future]]] = [[]]
+        size = 0
+        for item in batch:
+            if chunks[-1] and size + len(item[0]) + 1 > self.max_batch_chars:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(item)
+            size += len(item[0]) + 1
+
+        for chunk in chunks:
+            lines = [line for line, _ in chunk]
+            logger.info(f"发送批量翻译请求，共 {len(lines)} 行")
+            try:
+                trans_result = await self._request_baidu('\n'.join(lines), from_lang, to_lang)
+            except Exception as e:
+                logger.error(f"批量翻译失败: {str(e)}")
+                trans_result = None
+
+            dst_lines: List[Optional[str]] = [None] * len(lines)
+            if trans_result:
+                if len(trans_result) == len(lines):
+                    dst_lines = [item.get('dst') for item in trans_result]
+                else:
+                    by_src = {item.get('src'): item.get('dst') for item in trans_result}
+                    dst_lines = [by_src.get(line) for line in lines]
+
+            for (_, future), dst in zip(chunk, dst_lines):
+                if not future.done():
+                    future.set_result(dst)
+
+    async def _request_baidu(self, query: str, from_lang: str, to_lang: str, **kwargs) -> Optional[List[Dict]]:
+        """请求百度翻译接口，返回逐行的 trans_result；未配置凭证时返回None"""
+        if not (self.appid and self.secret_key):
+            return None
         salt = str(random.randint(32768, 65536))
         sign = await self._generate_sign(query, salt)
 
@@ -136,54 +376,89 @@ class BaiduTranslator():
             **kwargs
         }
 
+        ticket = self.baidu_breaker.allow()
+        if ticket is None:
+            logger.warning(f"百度翻译已熔断，{self.baidu_breaker.retry_after():.0f}秒后重试，跳过翻译")
+            return None
+
         try:
             logger.info(f"发送翻译请求: {query[:50]}... (from {from_lang} to {to_lang})")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.api_url, params=params, timeout=10) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-
-                    if 'error_code' in result:
-                        error_code = result.get('error_code')
-                        error_msg = self.ERROR_MESSAGES.get(error_code, '未知错误')
-                        logger.error(f"API返回错误: {error_code} - {error_msg}")
-                        return None
-
-                    return ''.join(item['dst'] for item in result.get('trans_result', []))
-
-        except aiohttp.ClientError as e:
+            session = await self._get_session()
+            async with session.get(self.api_url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                result = await response.json()
+
+                if 'error_code' in result:
+                    error_code = int(result.get('error_code'))
+                    error_msg = self.ERROR_MESSAGES.get(error_code, '未知错误')
+                    logger.error(f"API返回错误: {error_code} - {error_msg}")
+                    if error_code in (52001, 52002, 54003, 54005):
+                        # 超时、系统错误和频率受限计入熔断
+                        self.baidu_breaker.record_failure()
+                    return None
+
+                self.baidu_breaker.record_success()
+                return result.get('trans_result', [])
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.baidu_breaker.record_failure()
             logger.error(f"请求失败: {str(e)}")
             return None
         except Exception as e:
             logger.error(f"未知错误: {str(e)}")
             return None
+        finally:
+            self.baidu_breaker.release(ticket)
 
     async def get_supported_languages(self) -> Dict[str, str]:
         """获取支持的语言列表"""
         return self.LANGUAGE_MAP.copy()
 
     async def translate_by_google(self, text, to="ja"):
-        """使用Google翻译文本（默认翻译为简体中文）异步版本"""
+        """使用Google翻译文本（默认翻译为日语）异步版本
+
+        遇到429或网络错误时按指数退避重试，总耗时不超过重试策略的deadline；
+        熔断器打开时直接返回None，由调用方使用原文。
+        """
+        cached = self.cache.get(text, 'auto', to)
+        if cached is not None:
+            logger.info(f"翻译缓存命中: {text[:50]}")
+            return cached
+
+        ticket = self.google_breaker.allow()
+        if ticket is None:
+            logger.warning(f"Google翻译已熔断，{self.google_breaker.retry_after():.0f}秒后重试，跳过翻译")
+            return None
+
         logger.info(f"开始调用谷歌翻译API，输入: {text}")
         start_time = time.time()
+        deadline = time.monotonic() + self.retry_policy.deadline
 
-        # 构建请求URL
-        url = f"https://translate.google.com/translate_a/single?client=gtx&dt=t&dj=1&ie=UTF-8&hl=zh-CN&sl=auto&tl={to}&q={text}"
-        logger.info(f"请求地址: {url}")
-
-        # 使用异步会话
-        async with aiohttp.ClientSession() as session:
-            while True:
-                try:
-                    async with session.get(url) as response:
-                        # 处理429错误（请求过多）
-                        if response.status == 429:
-                            logger.warning(f"HTTP 429: Google翻译请求超限，将等待{self._google_trans_wait}秒后重试")
-                            await asyncio.sleep(self._google_trans_wait)
-                            self._google_trans_wait += random.randint(60, 90)
-                            continue
+        url = "https://translate.google.com/translate_a/single"
+        params = {'client': 'gtx', 'dt': 't', 'dj': '1', 'ie': 'UTF-8', 'hl': 'zh-CN', 'sl': 'auto', 'tl': to, 'q': text}
 
+        try:
+            return await self._request_google(url, params, deadline, start_time)
+        finally:
+            self.google_breaker.release(ticket)
+
+    async def _request_google(self, url: str, params: Dict[str, str], deadline: float, start_time: float) -> Optional[str]:
+        """在deadline内带退避重试地请求谷歌翻译，成功时写入翻译缓存"""
+        text, to = params['q'], params['tl']
+        # 使用共享会话
+        session = await self._get_session()
+        for attempt in range(self.retry_policy.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=remaining)) as response:
+                    # 处理429错误（请求过多）
+                    if response.status == 429:
+                        self.google_breaker.record_failure()
+                        logger.warning(f"HTTP 429: Google翻译请求超限（第 {attempt + 1} 次）")
+                    else:
                         # 检查其他错误状态
                         response.raise_for_status()
 
@@ -194,14 +469,29 @@ class BaiduTranslator():
                         end_time = time.time()
                         logger.info(f"翻译完成，耗时 {end_time - start_time:.2f} 秒")
 
-                        return "".join([sentence["trans"] for sentence in sentences])
-
-                except aiohttp.ClientError as e:
-                    logger.error(f"谷歌翻译请求失败: {str(e)}")
-                    raise
-                except json.JSONDecodeError:
-                    logger.error("谷歌翻译响应解析失败")
-                    raise
+                        self.google_breaker.record_success()
+                        result = "".join([sentence["trans"] for sentence in sentences])
+                        self.cache.set(text, 'auto', to, result)
+                        await self.cache.maybe_save()
+                        return result
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.google_breaker.record_failure()
+                logger.error(f"谷歌翻译请求失败: {str(e)}")
+            except (ValueError, KeyError):
+                self.google_breaker.record_failure()
+                logger.error("谷歌翻译响应解析失败")
+                return None
+
+            if self.google_breaker.state == self.google_breaker.OPEN:
+                break
+            delay = self.retry_policy.backoff(attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+
+        logger.warning(f"Google翻译失败，耗时 {time.time() - start_time:.2f} 秒，使用原文")
+        return None
 
     async def translate(self, text: str) -> Optional[str]:
         """统一翻译接口
@@ -210,7 +500,7 @@ class BaiduTranslator():
             text: 要翻译的文本
             
         Returns:
-            翻译后的文本，失败则返回None
+            翻译后的文本，翻译失败或服务熔断时返回原文
         """
         logger.info(f"开始翻译文本，内容: {text[:50]}...")
         
@@ -221,5 +511,16 @@ class BaiduTranslator():
             logger.warning("百度翻译API配置不完整，将使用Google翻译")
             result = await self.translate_by_google(text)
         
+        if not result:
+            logger.warning("翻译失败，使用原文")
+            return text
+
         logger.info(f"翻译完成，结果: {result[:50]}...")
-        return result
\ No newline at end of file
+        return result
+
+    def breaker_stats(self) -> Dict[str, Dict[str, object]]:
+        """翻译服务熔断器状态"""
+        return {
+            'baidu': self.baidu_breaker.stats(),
+            'google': self.google_breaker.stats(),
+        }
\ No newline at end of file
@@ -0,0 +1,70 @@
+from typing import Any, Dict, Optional
+import aiohttp
+
+
+class TransportConfig:
+    """
+    HTTP传输层配置
+
+    包含连接池大小、DNS缓存、长连接保持时间、各阶段超时和可选的HTTP代理。
+    会话必须在运行中的事件循环里创建，因此这里只保存参数，由调用方按需创建。
+    """
+
+    def __init__(
+            self,
+            limit: int = 100,
+            limit_per_host: int = 10,
+            ttl_dns_cache: int = 300,
+            keepalive_timeout: float = 30,
+            connect_timeout: float = 5,
+            read_timeout: float = 15,
+            total_timeout: float = 30,
+            proxy: Optional[str] = None
+    ):
+        self.limit = int(limit)
+        self.limit_per_host = int(limit_per_host)
+        self.ttl_dns_cache = int(ttl_dns_cache)
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.proxy = proxy or None
+
+    @classmethod
+    def from_config(cls, config: Any) -> "TransportConfig":
+        """从插件配置读取，未配置的项使用默认值"""
+        return cls(
+            limit=config.get("http_limit", 100),
+            limit_per_host=config.get("http_limit_per_host", 10),
+            ttl_dns_cache=config.get("http_dns_cache_ttl", 300),
+            keepalive_timeout=config.get("http_keepalive_timeout", 30),
+            connect_timeout=config.get("http_connect_timeout", 5),
+            read_timeout=config.get("http_read_timeout", 15),
+            total_timeout=config.get("http_total_timeout", 30),
+            proxy=config.get("http_proxy", ""),
+        )
+
+    def timeout(self) -> aiohttp.ClientTimeout:
+        # 0 表示不限制
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout or None,
+            connect=self.connect_timeout or None,
+            sock_read=self.read_timeout or None
+        )
+
+    def create_session(self, headers: Optional[Dict[str, str]] = None) -> aiohttp.ClientSession:
+        """创建会话，需在运行中的事件循环内调用"""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.ttl_dns_cache,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        return aiohttp.ClientSession(headers=headers, connector=connector, timeout=self.timeout())
+
+    def __repr__(self) -> str:
+        return (
+            f"TransportConfig(limit={self.limit}, limit_per_host={self.limit_per_host}, "
+            f"timeout={self.connect_timeout}/{self.read_timeout}/{self.total_timeout}, "
+            f"proxy={'已配置' if self.proxy else '未配置'})"
+        )
@@ -0,0 +1,148 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from astrbot.core import logger
+
+
+class Prewarmer:
+    """
+    后台预热最新影片
+
+    定期抓取 /api/movies 列表的前 N 页，对新出现的番号预取详情和磁力链接，
+    写入响应缓存和本地存储，用户首次查询新片时直接命中缓存。
+
+    使用示例:
+    warmer = Prewarmer(api, pages=2, interval=1800)
+    warmer.start()          # 需在运行中的事件循环内调用
+    await warmer.stop()
+    """
+
+    def __init__(
+            self,
+            api,
+            pages: int = 2,
+            interval: float = 1800,
+            concurrency: int = 2,
+            movie_types: Iterable[str] = ("normal",),
+            initial_delay: float = 60,
+            max_seen: int = 5000
+    ):
+        self.api = api
+        self.pages = max(1, int(pages))
+        self.interval = max(60.0, float(interval))
+        self.concurrency = max(1, int(concurrency))
+        self.movie_types = [t for t in movie_types if t] or ["normal"]
+        self.initial_delay = initial_delay
+        self.max_seen = max_seen
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+        self.rounds = 0
+        self.pages_fetched = 0
+        self.warmed = 0
+        self.errors = 0
+
+    @classmethod
+    def from_config(cls, api, config) -> Optional["Prewarmer"]:
+        if not config.get("prewarm_enabled", False):
+            return None
+        movie_types = str(config.get("prewarm_types", "normal")).replace('，', ',').split(',')
+        return cls(
+            api,
+            pages=config.get("prewarm_pages", 2),
+            interval=config.get("prewarm_interval", 1800),
+            concurrency=config.get("prewarm_concurrency", 2),
+            movie_types=[t.strip() for t in movie_types]
+        )
+
+    def start(self) -> bool:
+        """启动后台预热任务；没有运行中的事件循环时返回False，稍后再试"""
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        except RuntimeError:
+            return False
+        logger.info(f"预热任务已启动，每 {self.interval:.0f} 秒抓取 {self.movie_types} 前 {self.pages} 页")
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"预热失败: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def _mark_seen(self, movie_id: str) -> None:
+        self._seen[movie_id] = None
+        self._seen.move_to_end(movie_id)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+
+    async def run_once(self) -> int:
+        """抓取一轮列表并预取新番号，返回本轮预热的影片数"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        listings = [(movie_type, page) for movie_type in self.movie_types for page in range(1, self.pages + 1)]
+        results = await asyncio.gather(
+            *(bounded(self.api.get_movies(page=page, movie_type=movie_type)) for movie_type, page in listings),
+            return_exceptions=True
+        )
+
+        new_ids: List[str] = []
+        for (movie_type, page), result in zip(listings, results):
+            if isinstance(result, Exception):
+                self.errors += 1
+                logger.warning(f"预热列表获取失败: {movie_type} 第 {page} 页 ({str(result)})")
+                continue
+            self.pages_fetched += 1
+            for movie in result.movies:
+                movie_id = movie.id.upper()
+                if movie_id and movie_id not in self._seen and movie_id not in new_ids:
+                    new_ids.append(movie_id)
+
+        warmed = await asyncio.gather(*(bounded(self._warm(movie_id)) for movie_id in new_ids))
+        count = sum(warmed)
+        self.rounds += 1
+        self.warmed += count
+        logger.info(f"预热完成：列表 {len(listings)} 页，新番号 {len(new_ids)} 个，成功预取 {count} 个")
+        return count
+
+    async def _warm(self, movie_id: str) -> bool:
+        try:
+            detail, _, _ = await self.api.get_movie_with_magnets(movie_id)
+        except Exception as e:
+            self.errors += 1
+            logger.debug("预热 %s 失败: %s", movie_id, e)
+            return False
+        if not detail:
+            return False
+        self._mark_seen(movie_id)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'rounds': self.rounds,
+            'pages': self.pages_fetched,
+            'warmed': self.warmed,
+            'errors': self.errors,
+            'seen': len(self._seen),
+        }